@@ -0,0 +1,99 @@
+"""
+Benchmark clean_reddit_formatting against the replace-loop version it replaced.
+
+Usage:
+    python -m benchmarks.bench_clean_text [--posts N] [--repeat N]
+"""
+
+import argparse
+import random
+import re
+import time
+
+from json_to_md import clean_reddit_formatting, clean_reddit_formatting_batch
+
+EMOJI_ESCAPES = [
+    "\\ud83e\\udd70",
+    "\\ud83d\\ude0d",
+    "\\ud83d\\ude18",
+    "\\ud83d\\udd25",
+    "\\u2764\\ufe0f",
+    "\\ud83d\\ude02",  # not in the old map
+    "\\ud83d\\udc4d",  # not in the old map
+]
+
+
+def legacy_clean_reddit_formatting(text):
+    """The previous implementation: one str.replace pass per map entry, then a regex."""
+    text = text.replace("&#x200B;", "")
+    emoji_map = {
+        "\\ud83e\\udd70": "🥰",
+        "\\ud83d\\ude0d": "😍",
+        "\\ud83d\\ude18": "😘",
+        "\\ud83d\\ude0f": "😏",
+        "\\ud83d\\ude09": "😉",
+        "\\u2764\\ufe0f": "❤️",
+        "\\ud83d\\udd25": "🔥",
+        "\\ud83c\\udf46": "🍆",
+    }
+    for encoded, unicode in emoji_map.items():
+        text = text.replace(encoded, unicode)
+    return re.sub(r"\\[a-z0-9]{4}", "", text)
+
+
+def make_posts(count, seed=0):
+    """Reddit-like bodies: mostly plain text, some entities and emoji escapes."""
+    rng = random.Random(seed)
+    words = "the quick brown fox jumps over a lazy dog while reading reddit".split()
+    posts = []
+    for _ in range(count):
+        parts = []
+        for _ in range(rng.randint(20, 400)):
+            roll = rng.random()
+            if roll < 0.02:
+                parts.append(rng.choice(EMOJI_ESCAPES))
+            elif roll < 0.03:
+                parts.append(rng.choice(["&amp;", "&gt;", "&#x200B;"]))
+            else:
+                parts.append(rng.choice(words))
+        posts.append(" ".join(parts))
+    return posts
+
+
+def _best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--posts", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    posts = make_posts(args.posts)
+    megabytes = sum(len(p) for p in posts) / 1e6
+    timings = {
+        "legacy replace loop": _best_of(
+            lambda: [legacy_clean_reddit_formatting(p) for p in posts], args.repeat
+        ),
+        "clean_reddit_formatting": _best_of(
+            lambda: [clean_reddit_formatting(p) for p in posts], args.repeat
+        ),
+        "clean_reddit_formatting_batch": _best_of(
+            lambda: clean_reddit_formatting_batch(posts), args.repeat
+        ),
+    }
+
+    print(f"{len(posts)} posts, {megabytes:.1f} MB of text")
+    baseline = timings["legacy replace loop"]
+    for name, elapsed in timings.items():
+        print(f"{name:32} {megabytes / elapsed:7.1f} MB/s  x{baseline / elapsed:5.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Import time of the entry-point modules, each in a fresh interpreter.
+
+Reports the best wall time of importing each module, and which heavy
+third-party packages the import pulled in. Credentials are removed from the
+environment, so a module that needs them at import fails here. Run it with
+the repo root as the working directory.
+
+Usage:
+    python -m benchmarks.bench_import [--repeat N] [module ...]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.fixtures import ROOT
+
+MODULES = [
+    "crawl",
+    "records",
+    "sinks",
+    "metrics",
+    "http_client",
+    "raw_api",
+    "threads",
+    "tweepy_fetch",
+    "reddit_fetch",
+    "threads_scraper_headless",
+    "json_to_md",
+]
+HEAVY_PACKAGES = ["praw", "tweepy", "playwright", "parsel", "lxml", "pyarrow", "httpx"]
+CREDENTIAL_VARS = [
+    "TWITTER_BEARER_TOKEN",
+    "THREADS_APP_SECRET",
+    "REDDIT_CLIENT_ID",
+    "REDDIT_CLIENT_SECRET",
+]
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps([elapsed, [p for p in {heavy!r} if p in sys.modules]]))
+"""
+
+
+def _import_once(module: str) -> tuple[float, list[str]]:
+    env = {k: v for k, v in os.environ.items() if k not in CREDENTIAL_VARS}
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_PACKAGES)],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        error = completed.stderr.strip().splitlines()[-1:] or ["failed"]
+        raise RuntimeError(error[0])
+    # The last line; an import that prints would otherwise break the parse
+    elapsed, loaded = json.loads(completed.stdout.strip().splitlines()[-1])
+    return elapsed, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    args = parser.parse_args()
+
+    for module in args.modules:
+        try:
+            runs = [_import_once(module) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{module:26} import failed: {e}")
+            continue
+        best = min(elapsed for elapsed, _ in runs)
+        loaded = ", ".join(runs[0][1]) or "-"
+        print(f"{module:26} {best * 1000:8.1f} ms  loads: {loaded}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Microbenchmark of the Threads post parsers on the sample post shapes.
+
+Compares, for both scrapers: JMESPath with the expression string on every
+item (the old behaviour), the precompiled expression, and parse_threads_bulk.
+
+Usage:
+    python -m benchmarks.bench_parse_thread [--copies N] [--repeat N]
+"""
+
+import argparse
+import time
+
+import jmespath
+
+import threads_scraper
+import threads_scraper_headless
+from benchmarks.fixtures import raw_thread_items
+
+
+def _best_of(fn, items, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(items)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _bench(module, items, repeat):
+    expression = module.THREAD_EXPRESSION.expression
+    if module is threads_scraper:
+        finish = module._finish_thread
+    else:
+        finish = module._build_post
+    strategies = {
+        "jmespath.search(str) per item": lambda batch: [
+            finish(jmespath.search(expression, data)) for data in batch
+        ],
+        "parse_thread (compiled)": lambda batch: [
+            module.parse_thread(data) for data in batch
+        ],
+        "parse_threads_bulk": module.parse_threads_bulk,
+    }
+
+    print(f"{module.__name__}: {len(items)} items")
+    baseline_time = expected = None
+    for name, fn in strategies.items():
+        elapsed, result = _best_of(fn, items, repeat)
+        if expected is None:
+            baseline_time, expected = elapsed, result
+        status = "ok" if result == expected else "MISMATCH"
+        print(
+            f"  {name:32} {elapsed * 1e6 / len(items):8.1f} us/item"
+            f"  x{baseline_time / elapsed:5.1f}  {status}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--copies", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    items = raw_thread_items(args.copies)
+    for module in (threads_scraper_headless, threads_scraper):
+        _bench(module, items, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Memory benchmark of the ThreadsPost representations on the sample posts.
+
+Parses the same raw thread items into: plain dataclasses (the old
+ThreadsPost), dicts (what vars(post) serialization produced), the slotted,
+frozen, interned ThreadsPost, and a RecordBatch. Reports what each keeps
+alive after the raw JSON is dropped, as measured by tracemalloc.
+
+Usage:
+    python -m benchmarks.bench_records [--copies N]
+"""
+
+import argparse
+import dataclasses
+import gc
+import json
+import tracemalloc
+
+import threads_scraper_headless
+from benchmarks.fixtures import raw_thread_items
+from records import RecordBatch
+from threads_scraper_headless import ThreadsPost
+
+# The old record type: same fields, per-instance __dict__, no interning
+LegacyThreadsPost = dataclasses.make_dataclass(
+    "LegacyThreadsPost",
+    [(field.name, field.type) for field in dataclasses.fields(ThreadsPost)],
+)
+
+
+def _parse_legacy(items):
+    # _build_post looks ThreadsPost up at call time, so swap the type in
+    threads_scraper_headless.ThreadsPost = LegacyThreadsPost
+    try:
+        return threads_scraper_headless.parse_threads_bulk(items)
+    finally:
+        threads_scraper_headless.ThreadsPost = ThreadsPost
+
+
+def _parse_dicts(items):
+    return [dataclasses.asdict(post) for post in _parse_legacy(items)]
+
+
+def _parse_batch(items):
+    return RecordBatch.from_records(
+        threads_scraper_headless.parse_threads_bulk(items), ThreadsPost
+    )
+
+
+STRATEGIES = {
+    "dataclass (old ThreadsPost)": _parse_legacy,
+    "dicts (vars(post))": _parse_dicts,
+    "slotted frozen, interned": threads_scraper_headless.parse_threads_bulk,
+    "RecordBatch": _parse_batch,
+}
+
+
+def _retained_bytes(build, blob):
+    """Bytes still allocated by build's result once the raw items are freed."""
+    gc.collect()
+    tracemalloc.start()
+    # Fresh objects per run, as a real parse produces, so nothing is shared
+    items = json.loads(blob)
+    result = build(items)
+    del items
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return retained, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--copies", type=int, default=500)
+    args = parser.parse_args()
+
+    blob = json.dumps(raw_thread_items(args.copies))
+    baseline = None
+    for name, build in STRATEGIES.items():
+        retained, count = _retained_bytes(build, blob)
+        baseline = baseline or retained
+        print(
+            f"{name:28} {retained / 1e6:8.2f} MB  {retained / count:7.0f} B/post"
+            f"  x{baseline / retained:4.2f} vs old"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Compare thread_items extraction strategies on a synthetic search-page blob.
+
+Usage:
+    python -m benchmarks.bench_thread_items [--copies N] [--repeat N]
+"""
+
+import argparse
+import json
+import time
+
+from nested_lookup import nested_lookup
+
+import thread_items
+from benchmarks.fixtures import threads_search_blob
+
+
+def _best_of(fn, blob, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(blob)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--copies", type=int, default=50)
+    parser.add_argument("--filler", type=int, default=400)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    blob = threads_search_blob(args.copies, args.filler)
+    strategies = {
+        "json.loads + nested_lookup": lambda b: nested_lookup(
+            "thread_items", json.loads(b)
+        ),
+        "extract_thread_items": thread_items.extract_thread_items,
+        "full parse + path/walk": lambda b: thread_items.thread_items_from_data(
+            thread_items.loads(b)
+        ),
+    }
+
+    print(f"Blob: {len(blob) / 1e6:.2f} MB, orjson: {thread_items.orjson is not None}")
+    baseline_time = expected = None
+    for name, fn in strategies.items():
+        elapsed, result = _best_of(fn, blob, args.repeat)
+        if expected is None:
+            baseline_time, expected = elapsed, result
+        status = "ok" if result == expected else "MISMATCH"
+        print(
+            f"{name:30} {elapsed * 1000:9.2f} ms  x{baseline_time / elapsed:5.1f}  {status}"
+        )
+
+
+if __name__ == "__main__":
+    main()
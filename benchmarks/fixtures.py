@@ -0,0 +1,165 @@
+"""
+Fixtures for the offline benchmarks, built from the sample outputs in the repo root.
+
+threads_posts.json and search_results.json hold parsed posts; the helpers
+here turn them back into the raw shapes the scrapers receive, so the parse
+paths can be timed without a browser or network.
+"""
+
+import json
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# Wire-format responses replayed by the stub server; see record_fixtures.py
+RECORDED = Path(__file__).resolve().parent / "recorded"
+
+
+def load_sample_posts() -> list[dict]:
+    """Parsed posts from threads_posts.json (ThreadsPost fields)."""
+    with open(ROOT / "threads_posts.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_sample_search_results() -> list[dict]:
+    """Parsed posts from search_results.json (threads_scraper.parse_thread fields)."""
+    with open(ROOT / "search_results.json", encoding="utf-8") as f:
+        return json.load(f)["threads"]
+
+
+def raw_thread_item(post: dict) -> dict:
+    """Rebuild a raw thread item, as found under thread_items, from a parsed post."""
+    videos = post.get("videos") or []
+    reply_count = post.get("reply_count") or 0
+    return {
+        "post": {
+            "caption": {"text": post["content"]},
+            "taken_at": post["published_on"],
+            "id": post["post_id"],
+            "pk": post["pk"],
+            "code": post["code"],
+            "user": {
+                "username": post["user_name"],
+                "profile_pic_url": post["user_pic"],
+                "is_verified": post["user_verified"],
+                "pk": post["user_pk"],
+                "id": post["user_id"],
+                "friendship_status": None,
+                "has_onboarded_to_text_post_app": True,
+            },
+            "has_audio": post.get("has_audio"),
+            "like_count": post.get("like_count", 0),
+            "carousel_media": None,
+            "carousel_media_count": post.get("image_count"),
+            "video_versions": [{"type": 101, "url": url} for url in videos],
+            "image_versions2": {
+                "candidates": [{"height": 1080, "width": 1080, "url": post["user_pic"]}]
+            },
+            "text_post_app_info": {
+                "is_post_unavailable": False,
+                "reply_to_author": None,
+                "share_info": {"quoted_post": None, "reposted_post": None},
+            },
+            "media_type": 19,
+        },
+        "line_type": "none",
+        "view_replies_cta_string": f"{reply_count} replies" if reply_count else None,
+        "should_show_replies_cta": bool(reply_count),
+    }
+
+
+def raw_search_result_item(post: dict) -> dict:
+    """Rebuild a raw thread item from a search_results.json post."""
+    return raw_thread_item(
+        {
+            "content": post["text"],
+            "published_on": post["published_on"],
+            "post_id": post["id"],
+            "pk": post["id"].split("_")[0],
+            "code": None,
+            "user_name": post["username"],
+            "user_pic": post["user_pic"],
+            "user_verified": post["user_verified"],
+            "user_pk": post["id"].split("_")[-1],
+            "user_id": post["id"].split("_")[-1],
+            "like_count": post["like_count"],
+            "videos": post["videos"],
+        }
+    )
+
+
+def raw_thread_items(copies: int = 1) -> list[dict]:
+    """Raw items for every sample post, repeated copies times with unique pks."""
+    items = []
+    for copy in range(copies):
+        for item in [raw_thread_item(p) for p in load_sample_posts()] + [
+            raw_search_result_item(p) for p in load_sample_search_results()
+        ]:
+            post = item["post"]
+            post["pk"] = f"{post['pk']}{copy:04d}"
+            items.append(item)
+    return items
+
+
+def threads_search_blob(copies: int = 20, filler_modules: int = 200) -> str:
+    """
+    A ScheduledServerJS data-sjs blob shaped like a Threads search page.
+
+    The thread items sit in a RelayPrefetchedStreamCache payload, next to
+    filler modules standing in for the config the real page ships alongside.
+    """
+    edges = [
+        {"node": {"thread": {"thread_items": [item], "id": item["post"]["pk"]}}}
+        for item in raw_thread_items(copies)
+    ]
+    filler = [
+        [
+            "ServerConfig",
+            "define",
+            None,
+            [{f"key_{i}_{j}": f"value {j}" * 4 for j in range(40)}],
+        ]
+        for i in range(filler_modules)
+    ]
+    payload = {
+        "__bbox": {
+            "complete": True,
+            "result": {"data": {"searchResults": {"edges": edges}}},
+        }
+    }
+    data = {
+        "require": [
+            [
+                "ScheduledServerJS",
+                "handle",
+                None,
+                [
+                    {
+                        "__bbox": {
+                            "require": filler
+                            + [
+                                [
+                                    "RelayPrefetchedStreamCache",
+                                    "next",
+                                    [],
+                                    ["adp_BarcelonaSearchResultsQuery", payload],
+                                ]
+                            ]
+                        }
+                    }
+                ],
+            ]
+        ]
+    }
+    return json.dumps(data)
+
+
+def threads_search_html(copies: int = 20, filler_modules: int = 200) -> str:
+    """A minimal search page carrying the blob plus an unrelated data-sjs script."""
+    other = json.dumps({"require": [["CometPlatformRootClient", "init", [], []]]})
+    blob = threads_search_blob(copies, filler_modules)
+    return (
+        "<html><head>"
+        f'<script type="application/json" data-sjs>{other}</script>'
+        f'<script type="application/json" data-sjs>{blob}</script>'
+        "</head><body></body></html>"
+    )
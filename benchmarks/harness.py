@@ -0,0 +1,169 @@
+"""
+Measurement and baseline comparison for benchmarks.suite.
+
+Each case is a callable returning how many items it produced. It is timed
+call by call for throughput and latency percentiles, then run once more
+under tracemalloc for its peak memory, so tracing never skews the timings.
+"""
+
+import contextlib
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+DEFAULT_TOLERANCE = 0.25
+# Differences below these are noise, whatever the relative change
+MIN_LATENCY_DELTA_MS = 0.5
+MIN_PEAK_DELTA_MB = 0.25
+
+
+@dataclass
+class Result:
+    name: str
+    calls: int
+    items: int  # per call
+    items_per_sec: float
+    p50_ms: float
+    p90_ms: float
+    p99_ms: float
+    peak_mb: float
+
+
+@dataclass
+class Regression:
+    name: str
+    metric: str
+    baseline: float
+    current: float
+
+    def __str__(self):
+        change = self.current / self.baseline - 1 if self.baseline else float("inf")
+        return (
+            f"{self.name}: {self.metric} {self.baseline:.2f} -> {self.current:.2f}"
+            f" ({change:+.0%})"
+        )
+
+
+def _percentile(samples: list[float], q: int) -> float:
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[q - 1]
+
+
+def measure(name: str, case: Callable[[], int], repeat: int, warmup: int = 1) -> Result:
+    """Time repeat calls of case after warmup untimed ones, then trace one for memory."""
+    # Cases print progress of their own; keep it out of the report
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(warmup):
+            case()
+        samples = []
+        items = 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            items = case()
+            samples.append(time.perf_counter() - start)
+
+        gc.collect()
+        tracemalloc.start()
+        try:
+            case()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    total = sum(samples)
+    return Result(
+        name=name,
+        calls=repeat,
+        items=items,
+        items_per_sec=items * repeat / total if total else 0.0,
+        p50_ms=_percentile(samples, 50) * 1000,
+        p90_ms=_percentile(samples, 90) * 1000,
+        p99_ms=_percentile(samples, 99) * 1000,
+        peak_mb=peak / 1e6,
+    )
+
+
+def print_report(results: list[Result], baseline: Optional[dict] = None):
+    print(
+        f"{'case':34} {'items':>6} {'items/s':>10} {'p50 ms':>9} {'p90 ms':>9}"
+        f" {'p99 ms':>9} {'peak MB':>8}  p50 speedup vs baseline"
+    )
+    for result in results:
+        base = (baseline or {}).get(result.name)
+        versus = f"x{base['p50_ms'] / result.p50_ms:5.2f}" if base else "     -"
+        print(
+            f"{result.name:34} {result.items:6d} {result.items_per_sec:10.0f}"
+            f" {result.p50_ms:9.3f} {result.p90_ms:9.3f} {result.p99_ms:9.3f}"
+            f" {result.peak_mb:8.2f}  {versus}"
+        )
+
+
+def load_baseline(path) -> dict:
+    """Results of a saved baseline keyed by case name, or {} if there is none."""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def save_baseline(path, results: list[Result], merge: bool = True):
+    """
+    Write results as the new baseline.
+
+    With merge, cases that weren't run this time (see suite --only) keep
+    their previous entries.
+    """
+    existing = load_baseline(path) if merge else {}
+    for result in results:
+        entry = asdict(result)
+        del entry["name"]
+        existing[result.name] = {
+            key: round(value, 3) if isinstance(value, float) else value
+            for key, value in entry.items()
+        }
+    data = {
+        "machine": {
+            "python": sys.version.split()[0],
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "processor": platform.machine(),
+        },
+        "results": dict(sorted(existing.items())),
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+def compare(
+    results: list[Result], baseline: dict, tolerance: float = DEFAULT_TOLERANCE
+) -> list[Regression]:
+    """
+    Cases whose median latency or peak memory grew by more than tolerance.
+
+    p90/p99 are reported but not gated on; with a few dozen calls they
+    move with scheduler noise far more than the median does.
+    """
+    regressions = []
+    for result in results:
+        base = baseline.get(result.name)
+        if base is None:
+            continue
+        for metric, floor in (
+            ("p50_ms", MIN_LATENCY_DELTA_MS),
+            ("peak_mb", MIN_PEAK_DELTA_MB),
+        ):
+            before, after = base[metric], getattr(result, metric)
+            if after > before * (1 + tolerance) and after - before > floor:
+                regressions.append(Regression(result.name, metric, before, after))
+    return regressions
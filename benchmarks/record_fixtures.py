@@ -0,0 +1,216 @@
+"""
+Write the recorded responses the benchmark stub server replays.
+
+Every file is built deterministically from the sample posts in the repo
+root, in the wire format of the API it stands in for: a Threads search
+page, a Threads keyword_search response, Twitter v2 recent-search pages,
+and Reddit search listing, comment tree and morechildren JSON.
+
+Usage:
+    python -m benchmarks.record_fixtures
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.bench_clean_text import make_posts
+from benchmarks.fixtures import (
+    RECORDED,
+    ROOT,
+    load_sample_posts,
+    threads_search_html,
+)
+
+THREADS_COPIES = 10
+THREADS_FILLER_MODULES = 100
+TWITTER_PAGES = 3
+TWITTER_PAGE_SIZE = 100
+REDDIT_SUBMISSIONS = 25
+REDDIT_TOP_LEVEL_COMMENTS = 10
+# Each top-level comment has two replies with one nested reply each
+REDDIT_COMMENTS_PER_THREAD = 5
+REDDIT_MORE_CHILDREN = 20
+# Fixed clock so regenerated files are byte-identical
+EPOCH = datetime(2025, 1, 6, 10, 0, tzinfo=timezone.utc)
+
+
+def _write(name: str, data):
+    path = RECORDED / name
+    if isinstance(data, str):
+        path.write_text(data, encoding="utf-8")
+    else:
+        path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    print(f"{path.relative_to(ROOT)}: {path.stat().st_size / 1e3:.0f} kB")
+
+
+def threads_keyword_search() -> dict:
+    posts = load_sample_posts()
+    return {
+        "data": [
+            {
+                "id": post["pk"],
+                "text": post["content"],
+                "media_type": "TEXT_POST",
+                "permalink": post["url"],
+                "timestamp": datetime.fromtimestamp(
+                    post["published_on"], timezone.utc
+                ).strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "username": post["user_name"],
+                "has_replies": bool(post["reply_count"]),
+                "is_quote_post": False,
+                "is_reply": False,
+            }
+            for post in posts
+        ]
+    }
+
+
+def twitter_pages() -> list[dict]:
+    texts = [p["content"] for p in load_sample_posts()]
+    pages = []
+    for page in range(TWITTER_PAGES):
+        tweets = []
+        for i in range(TWITTER_PAGE_SIZE):
+            n = page * TWITTER_PAGE_SIZE + i
+            tweets.append(
+                {
+                    "id": str(1876000000000000000 - n),
+                    "text": texts[n % len(texts)][:280],
+                    "author_id": str(100000 + n % 37),
+                    "created_at": (EPOCH - timedelta(minutes=n))
+                    .isoformat()
+                    .replace("+00:00", ".000Z"),
+                }
+            )
+        meta = {
+            "result_count": len(tweets),
+            "newest_id": tweets[0]["id"],
+            "oldest_id": tweets[-1]["id"],
+        }
+        if page + 1 < TWITTER_PAGES:
+            meta["next_token"] = f"page{page + 1}"
+        pages.append({"data": tweets, "meta": meta})
+    return pages
+
+
+def _submission(i: int, body: str) -> dict:
+    submission_id = f"1hv{i:03d}"
+    return {
+        "kind": "t3",
+        "data": {
+            "id": submission_id,
+            "name": f"t3_{submission_id}",
+            "title": body[:80],
+            "selftext": body,
+            "url": f"https://www.reddit.com/r/dating/comments/{submission_id}/",
+            "permalink": f"/r/dating/comments/{submission_id}/",
+            "author": f"user_{i % 7}",
+            "subreddit": "dating",
+            "created_utc": (EPOCH - timedelta(hours=i)).timestamp(),
+            "score": 100 - i,
+            "num_comments": REDDIT_TOP_LEVEL_COMMENTS * REDDIT_COMMENTS_PER_THREAD
+            + REDDIT_MORE_CHILDREN,
+        },
+    }
+
+
+def reddit_search() -> dict:
+    bodies = make_posts(REDDIT_SUBMISSIONS, seed=1)
+    return {
+        "kind": "Listing",
+        "data": {
+            "after": None,
+            "before": None,
+            "children": [_submission(i, body) for i, body in enumerate(bodies)],
+        },
+    }
+
+
+def _comment(comment_id: str, parent: str, body: str, n: int, replies=None) -> dict:
+    return {
+        "kind": "t1",
+        "data": {
+            "id": comment_id,
+            "name": f"t1_{comment_id}",
+            "parent_id": parent,
+            "link_id": "t3_1hv000",
+            "body": body,
+            "author": f"commenter_{n % 11}",
+            "created_utc": (EPOCH - timedelta(minutes=n)).timestamp(),
+            "permalink": f"/r/dating/comments/1hv000/_/{comment_id}/",
+            "score": n % 13,
+            "replies": (
+                {
+                    "kind": "Listing",
+                    "data": {"after": None, "before": None, "children": replies},
+                }
+                if replies
+                else ""
+            ),
+        },
+    }
+
+
+def reddit_comments() -> list:
+    """A /comments/<id> response: the submission, then a three-level tree and a stub."""
+    bodies = iter(
+        make_posts(REDDIT_TOP_LEVEL_COMMENTS * REDDIT_COMMENTS_PER_THREAD, seed=2)
+    )
+    top_level = []
+    n = 0
+    for i in range(REDDIT_TOP_LEVEL_COMMENTS):
+        top_id = f"c{i:02d}"
+        replies = []
+        for j in range(2):
+            reply_id = f"{top_id}r{j}"
+            nested = [_comment(f"{reply_id}n", f"t1_{reply_id}", next(bodies), n + 3)]
+            replies.append(
+                _comment(reply_id, f"t1_{top_id}", next(bodies), n + 2, nested)
+            )
+        top_level.append(_comment(top_id, "t3_1hv000", next(bodies), n + 1, replies))
+        n += REDDIT_COMMENTS_PER_THREAD
+    top_level.append(
+        {
+            "kind": "more",
+            "data": {
+                "id": "m0",
+                "name": "t1_m0",
+                "parent_id": "t3_1hv000",
+                "count": REDDIT_MORE_CHILDREN,
+                "depth": 0,
+                "children": [f"mc{i:02d}" for i in range(REDDIT_MORE_CHILDREN)],
+            },
+        }
+    )
+    submission = _submission(0, make_posts(1, seed=3)[0])
+    return [
+        {"kind": "Listing", "data": {"after": None, "children": [submission]}},
+        {"kind": "Listing", "data": {"after": None, "children": top_level}},
+    ]
+
+
+def reddit_morechildren() -> dict:
+    bodies = make_posts(REDDIT_MORE_CHILDREN, seed=4)
+    things = [
+        _comment(f"mc{i:02d}", "t3_1hv000", body, 100 + i)
+        for i, body in enumerate(bodies)
+    ]
+    return {"json": {"errors": [], "data": {"things": things}}}
+
+
+def main():
+    RECORDED.mkdir(exist_ok=True)
+    _write(
+        "threads_search.html",
+        threads_search_html(THREADS_COPIES, THREADS_FILLER_MODULES),
+    )
+    _write("threads_keyword_search.json", threads_keyword_search())
+    for page, data in enumerate(twitter_pages()):
+        _write(f"twitter_search_recent_{page}.json", data)
+    _write("reddit_search.json", reddit_search())
+    _write("reddit_comments.json", reddit_comments())
+    _write("reddit_morechildren.json", reddit_morechildren())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Local HTTP server replaying the recorded responses in benchmarks/recorded/.
+
+Stands in for api.twitter.com, graph.threads.net, threads.net and the
+Reddit OAuth API, so the fetch paths run end to end (HTTP client, retries,
+rate_limit scheduler, JSON decoding, PRAW object building) without network
+access or credentials. Responses carry each API's real rate-limit headers
+(Twitter x-rate-limit-*, Reddit x-ratelimit-*, Meta X-App-Usage), so
+header parsing and bucket updates run too; the quotas they report are
+large enough never to slow a benchmark down.
+
+Usage:
+    with StubServer() as stub:
+        reddit_client.RedditClientPool(reddit_url=stub.url, oauth_url=stub.url)
+"""
+
+import json
+import threading
+import time
+from typing import Optional
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks.fixtures import RECORDED
+
+# Submission the recorded comment tree and morechildren things belong to
+RECORDED_SUBMISSION = b"1hv000"
+
+ACCESS_TOKEN = {
+    "access_token": "bench-token",
+    "token_type": "bearer",
+    "expires_in": 86400,
+    "scope": "*",
+}
+
+
+# Requests left in every reported window
+STUB_QUOTA = 10**9
+STUB_WINDOW = 900
+REDDIT_WINDOW = 300
+
+
+def twitter_quota_headers() -> dict:
+    return {
+        "x-rate-limit-limit": str(STUB_QUOTA),
+        "x-rate-limit-remaining": str(STUB_QUOTA - 1),
+        "x-rate-limit-reset": str(int(time.time()) + STUB_WINDOW),
+    }
+
+
+def reddit_quota_headers() -> dict:
+    # Reddit reports floats and the reset in seconds from now. Its windows
+    # are 10 minutes; prawcore spaces requests out if a reset is further off
+    return {
+        "x-ratelimit-used": "1",
+        "x-ratelimit-remaining": f"{STUB_QUOTA - 1:.1f}",
+        "x-ratelimit-reset": str(REDDIT_WINDOW),
+    }
+
+
+def meta_quota_headers() -> dict:
+    # Percentages of the app's quota used
+    return {
+        "x-app-usage": json.dumps(
+            {"call_count": 1, "total_cputime": 1, "total_time": 1}
+        )
+    }
+
+
+def _load(name: str) -> bytes:
+    return (RECORDED / name).read_bytes()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle on, keep-alive
+    # clients stall on a delayed ACK for every response
+    disable_nagle_algorithm = True
+    server: "_Server"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(
+        self,
+        body: bytes,
+        content_type: str = "application/json",
+        headers: Optional[dict] = None,
+    ):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.count_request(len(body))
+
+    def _not_found(self):
+        self.send_response(404)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        path = url.path.rstrip("/")
+        query = parse_qs(url.query)
+        responses = self.server.responses
+        if path == "/2/tweets":
+            return self._send(
+                self.server.lookup_tweets(query.get("ids", [""])[0]),
+                headers=twitter_quota_headers(),
+            )
+        if path in ("/2/tweets/search/recent", "/2/tweets/search/all"):
+            token = query.get("next_token", ["page0"])[0]
+            page = responses["twitter"].get(token)
+            if not page:
+                return self._not_found()
+            return self._send(page, headers=twitter_quota_headers())
+        if path == "/v1.0/keyword_search":
+            return self._send(
+                responses["threads_keyword_search"], headers=meta_quota_headers()
+            )
+        if path == "/search":
+            return self._send(responses["threads_search"], "text/html; charset=utf-8")
+        if path.startswith("/r/") and path.endswith("/search"):
+            return self._send(
+                responses["reddit_search"], headers=reddit_quota_headers()
+            )
+        if path.startswith("/comments/"):
+            return self._send(
+                self.server.for_submission("reddit_comments", path.split("/")[2]),
+                headers=reddit_quota_headers(),
+            )
+        self._not_found()
+
+    def do_POST(self):
+        form = parse_qs(
+            self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode()
+        )
+        path = urlsplit(self.path).path.rstrip("/")
+        if path == "/api/v1/access_token":
+            return self._send(json.dumps(ACCESS_TOKEN).encode())
+        if path == "/api/morechildren":
+            link_id = form.get("link_id", ["t3_1hv000"])[0]
+            return self._send(
+                self.server.for_submission("reddit_morechildren", link_id[3:]),
+                headers=reddit_quota_headers(),
+            )
+        self._not_found()
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency: float):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.latency = latency
+        self.requests = 0
+        self.bytes_sent = 0
+        self._stats_lock = threading.Lock()
+        self.responses = {
+            "twitter": {},
+            "threads_keyword_search": _load("threads_keyword_search.json"),
+            "threads_search": _load("threads_search.html"),
+            "reddit_search": _load("reddit_search.json"),
+            "reddit_comments": _load("reddit_comments.json"),
+            "reddit_morechildren": _load("reddit_morechildren.json"),
+        }
+        for page, path in enumerate(
+            sorted(RECORDED.glob("twitter_search_recent_*.json"))
+        ):
+            self.responses["twitter"][f"page{page}"] = path.read_bytes()
+        self.tweets = {
+            tweet["id"]: tweet
+            for page in self.responses["twitter"].values()
+            for tweet in json.loads(page)["data"]
+        }
+
+    def lookup_tweets(self, ids: str) -> bytes:
+        """A tweet lookup response for comma-separated ids, authors under includes."""
+        tweets = [self.tweets[i] for i in ids.split(",") if i in self.tweets]
+        users = {
+            tweet["author_id"]: {
+                "id": tweet["author_id"],
+                "name": f"User {tweet['author_id']}",
+                "username": f"user{tweet['author_id']}",
+                "verified": False,
+            }
+            for tweet in tweets
+        }
+        return json.dumps(
+            {"data": tweets, "includes": {"users": list(users.values())}}
+        ).encode()
+
+    def for_submission(self, name: str, submission_id: str) -> bytes:
+        """A recorded Reddit response, moved under the submission that was asked for."""
+        return self.responses[name].replace(RECORDED_SUBMISSION, submission_id.encode())
+
+    def count_request(self, size: int):
+        with self._stats_lock:
+            self.requests += 1
+            self.bytes_sent += size
+
+
+class StubServer:
+    """
+    Recorded-response server on a free localhost port, run in a background thread.
+
+    latency (seconds) is added to every response to model a network round
+    trip; requests and bytes_sent count what has been served.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def requests(self) -> int:
+        return self._server.requests
+
+    @property
+    def bytes_sent(self) -> int:
+        return self._server.bytes_sent
+
+    def start(self) -> "StubServer":
+        self._server = _Server(self.latency)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,221 @@
+"""
+Offline benchmark suite over recorded Threads, Twitter and Reddit responses.
+
+Parse cases run on the files in benchmarks/recorded/. Fetch cases run the
+real fetchers (http_client, raw_api, threads, reddit_fetch through PRAW)
+against a local stub server replaying those files, so they cover HTTP,
+JSON decoding and record building without network access or credentials.
+Each case reports throughput, p50/p90/p99 latency and peak memory, and is
+compared with the saved baseline; a regression beyond the tolerance fails
+the run. Regenerate the recordings with benchmarks.record_fixtures.
+
+Usage:
+    python -m benchmarks.suite [--repeat N] [--only SUBSTRING] [--latency-ms MS]
+                               [--save-baseline] [--baseline PATH] [--tolerance F]
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import http_client
+import rate_limit
+import raw_api
+import reddit_client
+import reddit_fetch
+import thread_items
+import threads
+import threads_scraper
+import threads_scraper_headless
+from benchmarks.bench_clean_text import make_posts
+from benchmarks.fixtures import RECORDED, raw_thread_items, threads_search_blob
+from benchmarks.harness import (
+    DEFAULT_TOLERANCE,
+    compare,
+    load_baseline,
+    measure,
+    print_report,
+    save_baseline,
+)
+from benchmarks.stub_server import StubServer
+from json_to_md import clean_reddit_formatting_batch, json_to_markdown
+
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+# Lift the nominal quotas so pacing isn't timed before the stub's headers arrive
+STUB_ENDPOINTS = [
+    "twitter:search_recent",
+    "twitter:search_all",
+    "twitter:tweets",
+    "threads:keyword_search",
+    "reddit",
+]
+UNLIMITED = (10**9, 1)
+# Backfill period; every window replays the recorded pages
+BACKFILL_START = datetime(2025, 1, 1)
+BACKFILL_END = datetime(2025, 1, 5)
+# Posts fetched per Reddit search; every search listing in the recording
+REDDIT_SEARCH_LIMIT = 25
+
+
+def _parse_cases() -> dict:
+    html = (RECORDED / "threads_search.html").read_text(encoding="utf-8")
+    blob = threads_search_blob(copies=10, filler_modules=100)
+    items = raw_thread_items(copies=20)
+    with open(RECORDED / "reddit_search.json", encoding="utf-8") as f:
+        listing = [child["data"] for child in json.load(f)["data"]["children"]]
+    posts = [
+        {"title": post["title"], "content": post["selftext"], "url": post["url"]}
+        for post in listing
+    ]
+    texts = make_posts(2000, seed=7)
+    return {
+        "threads.extract_thread_items": lambda: len(
+            thread_items.extract_thread_items(blob)
+        ),
+        "threads.parse_threads_bulk": lambda: len(
+            threads_scraper_headless.parse_threads_bulk(items)
+        ),
+        "threads.parse_threads_bulk[scraper]": lambda: len(
+            threads_scraper.parse_threads_bulk(items)
+        ),
+        "threads.parse_search_page": lambda: sum(
+            1 for _ in threads_scraper_headless.parse_search_page(html, 10**6)
+        ),
+        "threads.extract_threads[scraper]": lambda: len(
+            threads_scraper.extract_threads(html)
+        ),
+        "reddit.clean_reddit_formatting_batch": lambda: len(
+            clean_reddit_formatting_batch(texts)
+        ),
+        "reddit.json_to_markdown": lambda: len(json_to_markdown(posts)) and len(posts),
+    }
+
+
+def check_quota_headers(stub: StubServer):
+    """
+    Send a request per API through http_client.request and check that the
+    quota in the stub's real rate-limit headers reached the scheduler.
+    """
+    routes = {
+        "twitter:search_recent": "/2/tweets/search/recent",
+        "threads:keyword_search": "/v1.0/keyword_search",
+        "reddit": "/r/all/search",
+    }
+    for endpoint, path in routes.items():
+        response = http_client.request(
+            "GET", f"{stub.url}{path}", rate_limit_key=endpoint, credential="quota"
+        )
+        response.raise_for_status()
+        status = rate_limit.scheduler.bucket(endpoint, "quota").status()
+        if status["remaining"] is None or status["remaining"] < 1:
+            sys.exit(f"{endpoint}: rate-limit headers not applied: {status}")
+
+
+def _fetch_cases(stub: StubServer) -> dict:
+    # Read by raw_api on the first request
+    os.environ.setdefault("TWITTER_BEARER_TOKEN", "bench-token")
+    for endpoint in STUB_ENDPOINTS:
+        rate_limit.scheduler.configure(endpoint, *UNLIMITED, min_interval=0)
+    raw_api.SEARCH_RECENT_URL = f"{stub.url}/2/tweets/search/recent"
+    raw_api.SEARCH_ALL_URL = f"{stub.url}/2/tweets/search/all"
+    raw_api.TWEETS_LOOKUP_URL = f"{stub.url}/2/tweets"
+    tweet_ids = [tweet["id"] for tweet in raw_api.iter_tweets("dating", total=None)]
+    threads.KEYWORD_SEARCH_URL = f"{stub.url}/v1.0/keyword_search"
+    reddit_client.pool = reddit_client.RedditClientPool(
+        [reddit_client.RedditCredential("bench", "bench", "social_apis-bench/1.0")],
+        reddit_url=stub.url,
+        oauth_url=stub.url,
+    )
+    search_url = f"{stub.url}/search"
+
+    def threads_search_page():
+        response = http_client.get(search_url, params={"q": "dating"}, use_cache=False)
+        return sum(
+            1 for _ in threads_scraper_headless.parse_search_page(response.text, 10**6)
+        )
+
+    return {
+        "fetch.twitter.iter_tweets": lambda: sum(
+            1 for _ in raw_api.iter_tweets("dating", total=None)
+        ),
+        "fetch.twitter.backfill": lambda: sum(
+            1 for _ in raw_api.backfill("dating", BACKFILL_START, BACKFILL_END)
+        ),
+        "fetch.twitter.lookup_tweets": lambda: sum(
+            1 for _ in raw_api.lookup_tweets(tweet_ids)
+        ),
+        "fetch.threads.search_threads": lambda: len(
+            threads.search_threads("dating", access_token="bench-token")["data"]
+        ),
+        "fetch.threads.search_page": threads_search_page,
+        "fetch.reddit.extract_reddit_posts": lambda: len(
+            reddit_fetch.extract_reddit_posts("dating", limit=REDDIT_SEARCH_LIMIT)
+        ),
+        "fetch.reddit.harvest_comments": lambda: len(
+            reddit_fetch.extract_reddit_posts(
+                "dating",
+                limit=REDDIT_SEARCH_LIMIT,
+                harvest=reddit_fetch.CommentHarvest(),
+            )
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--only", help="Run the cases whose name contains this")
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=0.0,
+        help="Delay the stub adds to every response",
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Write this run as the new baseline instead of comparing",
+    )
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    if not (RECORDED / "threads_search.html").exists():
+        sys.exit("No recordings; run python -m benchmarks.record_fixtures first")
+
+    results = []
+    with StubServer(latency=args.latency_ms / 1000) as stub:
+        check_quota_headers(stub)
+        cases = {**_parse_cases(), **_fetch_cases(stub)}
+        for name, case in cases.items():
+            if args.only and args.only not in name:
+                continue
+            results.append(measure(name, case, args.repeat))
+        served = stub.requests
+    http_client.close_client()
+
+    baseline = {} if args.save_baseline else load_baseline(args.baseline)
+    print_report(results, baseline)
+    print(f"\nStub server: {served} requests")
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"Baseline written to {args.baseline}")
+        return
+    if not baseline:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\nRegressions beyond {args.tolerance:.0%}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
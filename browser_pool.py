@@ -0,0 +1,149 @@
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterable, Optional, TypeVar
+
+from playwright.async_api import Browser, BrowserContext, Error, Page, async_playwright
+
+from threads_page import block_heavy_resources_async
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+POOL_SIZE = 4
+MAX_USES_PER_CONTEXT = 50
+VIEWPORT = {"width": 1920, "height": 1080}
+
+
+@dataclass
+class _Slot:
+    context: Optional[BrowserContext] = None
+    page: Optional[Page] = None
+    uses: int = 0
+
+
+class BrowserPool:
+    """
+    One Chromium process with N warm contexts, each holding a single page.
+
+    Callers check out a page with ``async with pool.page() as page``. A
+    context is thrown away and rebuilt after max_uses checkouts, or as soon
+    as a Playwright error escapes the block (crashed page, closed target).
+    If the browser itself dies, it is relaunched on the next checkout.
+    With block_resources, every context aborts images, media, fonts,
+    stylesheets and tracker requests.
+
+    Usage:
+        async with BrowserPool(size=4) as pool:
+            results = await pool.map(scrape, queries)
+    """
+
+    def __init__(
+        self,
+        size: int = POOL_SIZE,
+        max_uses: int = MAX_USES_PER_CONTEXT,
+        headless: bool = True,
+        viewport: Optional[dict] = None,
+        block_resources: bool = False,
+    ):
+        self.size = size
+        self.max_uses = max_uses
+        self.headless = headless
+        self.viewport = viewport or VIEWPORT
+        self.block_resources = block_resources
+        self._playwright = None
+        self._browser: Optional[Browser] = None
+        self._browser_lock = asyncio.Lock()
+        self._slots: asyncio.Queue = asyncio.Queue()
+
+    async def start(self):
+        self._playwright = await async_playwright().start()
+        await self._ensure_browser()
+        for _ in range(self.size):
+            slot = _Slot()
+            await self._open(slot)
+            self._slots.put_nowait(slot)
+        return self
+
+    async def close(self):
+        while not self._slots.empty():
+            await self._discard(self._slots.get_nowait())
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _ensure_browser(self) -> Browser:
+        async with self._browser_lock:
+            if self._browser is None or not self._browser.is_connected():
+                self._browser = await self._playwright.chromium.launch(
+                    headless=self.headless
+                )
+            return self._browser
+
+    async def _open(self, slot: _Slot):
+        browser = await self._ensure_browser()
+        slot.context = await browser.new_context(viewport=self.viewport)
+        if self.block_resources:
+            await block_heavy_resources_async(slot.context)
+        slot.page = await slot.context.new_page()
+        slot.uses = 0
+
+    async def _discard(self, slot: _Slot):
+        if slot.context is not None:
+            try:
+                await slot.context.close()
+            except Error:
+                pass  # Already gone with a crashed page or browser
+        slot.context = slot.page = None
+
+    async def _recycle(self, slot: _Slot):
+        await self._discard(slot)
+        await self._open(slot)
+
+    @asynccontextmanager
+    async def page(self):
+        """Check out a warm page for the duration of the block."""
+        slot = await self._slots.get()
+        try:
+            if slot.page is None or slot.page.is_closed():
+                await self._recycle(slot)
+            slot.uses += 1
+            try:
+                yield slot.page
+            except Error:
+                await self._recycle(slot)
+                raise
+            if slot.uses >= self.max_uses:
+                await self._recycle(slot)
+        finally:
+            self._slots.put_nowait(slot)
+
+    async def map(
+        self,
+        fn: Callable[[Page, T], Awaitable[R]],
+        items: Iterable[T],
+        return_exceptions: bool = True,
+    ) -> list:
+        """
+        Run fn(page, item) for every item across the pool's pages.
+
+        Results come back in input order. With return_exceptions, a failed
+        item yields its exception instead of cancelling the others.
+        """
+
+        async def run(item):
+            async with self.page() as page:
+                return await fn(page, item)
+
+        return await asyncio.gather(
+            *(run(item) for item in items), return_exceptions=return_exceptions
+        )
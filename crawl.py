@@ -0,0 +1,385 @@
+import argparse
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+import metrics
+import rate_limit
+import response_cache
+from crawl_state import CrawlState, HighWaterMark
+from dedupe import DedupeIndex
+from records import SocialMediaData
+from sinks import open_sink
+
+
+@dataclass
+class SourceConfig:
+    """Per-source crawl settings."""
+
+    concurrency: int = 4  # queries of this source running at the same time
+    requests_per_minute: Optional[int] = None  # overrides the shared scheduler quota
+    options: dict = field(
+        default_factory=dict
+    )  # extra keyword arguments for the fetcher
+
+
+DEFAULT_SOURCES = {
+    "reddit": SourceConfig(concurrency=2),
+    "twitter": SourceConfig(concurrency=4),
+    "threads": SourceConfig(concurrency=4),
+    "threads_scrape": SourceConfig(concurrency=4),
+}
+
+# Scheduler endpoint each source's requests are paced under
+RATE_LIMIT_KEYS = {
+    "reddit": "reddit",
+    "twitter": "twitter:search_recent",
+    "threads": "threads:keyword_search",
+}
+
+
+class CrawlContext:
+    """Resources shared by the fetchers of one crawl, created on first use."""
+
+    def __init__(self, sources: dict):
+        self.sources = sources
+        self._pool = None
+        self._pool_lock = asyncio.Lock()
+
+    async def browser_pool(self):
+        async with self._pool_lock:
+            if self._pool is None:
+                from browser_pool import BrowserPool
+
+                size = self.sources["threads_scrape"].concurrency
+                self._pool = await BrowserPool(size=size).start()
+            return self._pool
+
+    async def close(self):
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+
+def _local_naive(value: datetime) -> datetime:
+    """Match the naive local-time datetimes the Reddit and Threads scrapers produce."""
+    return value.astimezone().replace(tzinfo=None)
+
+
+def _tweet_item(tweet: dict) -> SocialMediaData:
+    return SocialMediaData(
+        id=tweet["id"],
+        type="post",
+        title=None,
+        url=f"https://twitter.com/i/web/status/{tweet['id']}",
+        author=tweet["author_id"],
+        content=tweet["text"],
+        date=_local_naive(
+            datetime.fromisoformat(tweet["created_at"].replace("Z", "+00:00"))
+        ),
+        parent_id=None,
+        source="twitter",
+    )
+
+
+def _threads_api_item(thread: dict) -> SocialMediaData:
+    return SocialMediaData(
+        id=thread["id"],
+        type="post",
+        title=None,
+        url=thread["permalink"],
+        author=thread["username"],
+        content=thread.get("text", ""),
+        date=_local_naive(
+            datetime.strptime(thread["timestamp"], "%Y-%m-%dT%H:%M:%S%z")
+        ),
+        parent_id=None,
+        source="threads",
+    )
+
+
+def _threads_post_item(post) -> SocialMediaData:
+    return SocialMediaData(
+        id=post.pk,
+        type="post",
+        title=None,
+        url=post.url,
+        author=post.user_name,
+        content=post.content,
+        date=post.posted_at,
+        parent_id=None,
+        source="threads",
+    )
+
+
+def _newest_post_timestamp(items: list) -> Optional[float]:
+    """Epoch seconds of the newest post among items, comments don't count."""
+    return max(
+        (item.date.timestamp() for item in items if item.type == "post" and item.date),
+        default=None,
+    )
+
+
+# Fetchers import their source module on first use, so a crawl only loads
+# (and needs credentials for) the sources it actually runs. Each one turns
+# the high-water mark of its (source, query) into the source's own "only
+# newer" filter and returns (items, newest source-native ID or None,
+# whether everything down to the mark was fetched). With a mark, results are
+# paged down to it without the source's count cap; a fetch that stopped
+# short of the mark leaves it in place, or the posts in between would never
+# be fetched.
+
+
+async def _fetch_reddit(
+    query: str, options: dict, context: CrawlContext, mark: HighWaterMark
+):
+    import reddit_fetch
+
+    progress = reddit_fetch.SearchProgress()
+    if mark.newest_ts is not None:
+        # The listing stops at the first post that isn't newer than the mark
+        options = {**options, "newer_than": mark.newest_ts, "limit": None}
+    items = await reddit_fetch.extract_reddit_posts_async(
+        query, progress=progress, **options
+    )
+    # The listing ran out (or came from the cache) before reaching the mark: keep it
+    complete = mark.newest_ts is None or progress.reached_mark
+    return items, None, complete
+
+
+async def _fetch_twitter(
+    query: str, options: dict, context: CrawlContext, mark: HighWaterMark
+):
+    import raw_api
+
+    if mark.newest_id is not None:
+        options = {**options, "total": None}
+        if raw_api.since_id_in_window(mark.newest_id):
+            options["since_id"] = mark.newest_id
+        # Otherwise the API would reject since_id: take the whole 7-day
+        # window instead, what's older is out of recent search's reach
+    tweets = await asyncio.to_thread(
+        lambda: list(raw_api.iter_tweets(query, **options))
+    )
+    newest_id = max((tweet["id"] for tweet in tweets), key=int, default=None)
+    return [_tweet_item(tweet) for tweet in tweets], newest_id, True
+
+
+async def _fetch_threads(
+    query: str, options: dict, context: CrawlContext, mark: HighWaterMark
+):
+    import threads
+
+    if mark.newest_ts is not None:
+        options = {**options, "since": mark.newest_ts}
+    results = await asyncio.to_thread(threads.search_threads, query, **options)
+    items = [_threads_api_item(thread) for thread in results.get("data", [])]
+    if mark.newest_ts is not None:
+        # since is inclusive, drop the post the mark was taken from
+        items = [item for item in items if item.date.timestamp() > mark.newest_ts]
+    return items, None, True
+
+
+async def _fetch_threads_scrape(
+    query: str, options: dict, context: CrawlContext, mark: HighWaterMark
+):
+    import threads_scraper_headless
+
+    progress = threads_scraper_headless.SearchProgress()
+    if mark.newest_ts is not None:
+        # Scroll the newest-first results until a post older than the mark
+        options = {
+            **options,
+            "newer_than": mark.newest_ts,
+            "max_posts_number": None,
+            "scroll": True,
+        }
+    pool = await context.browser_pool()
+    async with pool.page() as page:
+        posts = await threads_scraper_headless.threads_posts_get_async(
+            page, query=query, progress=progress, **options
+        )
+    # Out of scroll time or results before reaching the mark: keep it
+    complete = mark.newest_ts is None or progress.reached_mark
+    return [_threads_post_item(post) for post in posts], None, complete
+
+
+FETCHERS = {
+    "reddit": _fetch_reddit,
+    "twitter": _fetch_twitter,
+    "threads": _fetch_threads,
+    "threads_scrape": _fetch_threads_scrape,
+}
+
+
+async def crawl(
+    queries: list[str],
+    sources: Optional[dict] = None,
+    state: Optional[CrawlState] = None,
+    dedupe: Optional[DedupeIndex] = None,
+) -> AsyncIterator[SocialMediaData]:
+    """
+    Run every query against every source concurrently and stream the results.
+
+    Each source has its own concurrency limit and, optionally, its own
+    request budget in the shared rate-limit scheduler, so a slow or throttled
+    source doesn't hold the others back. Items are yielded as soon as the
+    (source, query) they belong to finishes. A failing pair is reported and
+    skipped.
+
+    With a state store the crawl is incremental: each (source, query) only
+    asks for content newer than its stored high-water mark, paging down to
+    it regardless of count caps in the source options, and the mark is
+    advanced once that pair finished successfully and reached it.
+
+    With a dedupe index, items collected before, by this crawl, an earlier
+    one or another source, are dropped instead of yielded.
+
+    :param queries: Search queries to run.
+    :param sources: Source name -> SourceConfig. Names not given use
+        DEFAULT_SOURCES; by default every source is crawled.
+    :param state: CrawlState holding the high-water marks, or None for a
+        full crawl.
+    :param dedupe: DedupeIndex to skip already collected items with.
+    :return: Async iterator of SocialMediaData from all sources.
+    """
+    if sources is None:
+        sources = dict(DEFAULT_SOURCES)
+    unknown = set(sources) - set(FETCHERS)
+    if unknown:
+        raise ValueError(f"Unknown sources: {', '.join(sorted(unknown))}")
+
+    for name, config in sources.items():
+        if config.requests_per_minute and name in RATE_LIMIT_KEYS:
+            rate_limit.scheduler.configure(
+                RATE_LIMIT_KEYS[name], config.requests_per_minute, 60
+            )
+
+    context = CrawlContext(sources)
+    semaphores = {
+        name: asyncio.Semaphore(config.concurrency) for name, config in sources.items()
+    }
+
+    async def run(name: str, query: str):
+        async with semaphores[name]:
+            mark = state.get(name, query) if state is not None else HighWaterMark()
+            try:
+                items, newest_id, complete = await FETCHERS[name](
+                    query, sources[name].options, context, mark
+                )
+            except Exception as e:
+                print(f"Error crawling {name} for {query!r}: {e}")
+                metrics.inc("fetch_errors_total", source=name, query=query)
+                return []
+            if state is not None and complete:
+                state.advance(name, query, newest_id, _newest_post_timestamp(items))
+            return items
+
+    tasks = [
+        asyncio.create_task(run(name, query)) for name in sources for query in queries
+    ]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            for item in await finished:
+                if dedupe is None or dedupe.add_item(item):
+                    yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await context.close()
+
+
+async def crawl_all(
+    queries: list[str],
+    sources: Optional[dict] = None,
+    state: Optional[CrawlState] = None,
+    dedupe: Optional[DedupeIndex] = None,
+) -> list:
+    """Collect the whole crawl into a list. See crawl."""
+    return [item async for item in crawl(queries, sources, state, dedupe)]
+
+
+async def _write_output(queries, sources, output_file, state=None, dedupe=None):
+    with open_sink(output_file, SocialMediaData) as sink:
+        async for item in crawl(queries, sources, state, dedupe):
+            sink.write(item)
+    print(f"Saved {sink.count} items to {output_file}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl several sources concurrently.")
+    parser.add_argument("-q", "--query", action="append", required=True)
+    parser.add_argument(
+        "-s", "--source", action="append", choices=sorted(FETCHERS), default=None
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="crawl.jsonl",
+        help="Output file: .jsonl, .parquet (needs pyarrow) or .sqlite3",
+    )
+    parser.add_argument(
+        "--state",
+        metavar="PATH",
+        help="SQLite file with high-water marks; only fetch what is new since the last run",
+    )
+    parser.add_argument(
+        "--cache",
+        metavar="PATH",
+        help="Cache responses in this SQLite file and reuse them while fresh",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Replay from --cache only, never touching the network",
+    )
+    parser.add_argument(
+        "--dedupe",
+        metavar="PATH",
+        help="SQLite dedupe index; skip items collected by any earlier run",
+    )
+    parser.add_argument(
+        "--near-duplicates",
+        action="store_true",
+        help="With --dedupe, also skip items whose text nearly matches a collected one",
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="PATH",
+        help="Write request, rate-limit, parse and throughput metrics to this file",
+    )
+    parser.add_argument(
+        "--openmetrics",
+        action="store_true",
+        help="With --metrics, use the OpenMetrics format instead of Prometheus text",
+    )
+    parser.add_argument(
+        "--spans",
+        action="store_true",
+        help="With --metrics, also time the stages of each fetch",
+    )
+    args = parser.parse_args()
+    if args.offline and not args.cache:
+        parser.error("--offline needs --cache")
+    if args.cache:
+        response_cache.enable(args.cache, offline=args.offline)
+    if args.metrics:
+        metrics.enable(args.metrics, openmetrics=args.openmetrics, spans=args.spans)
+
+    selected = {name: DEFAULT_SOURCES[name] for name in args.source or DEFAULT_SOURCES}
+    crawl_state = CrawlState(args.state) if args.state else None
+    dedupe_index = (
+        DedupeIndex(args.dedupe, near_duplicates=args.near_duplicates)
+        if args.dedupe
+        else None
+    )
+    try:
+        asyncio.run(
+            _write_output(args.query, selected, args.output, crawl_state, dedupe_index)
+        )
+    finally:
+        for store in (crawl_state, dedupe_index):
+            if store is not None:
+                store.close()
+        metrics.disable()
@@ -0,0 +1,123 @@
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+DEFAULT_STATE_PATH = "crawl_state.sqlite3"
+
+
+@dataclass
+class HighWaterMark:
+    """Newest item seen so far for one (source, query)."""
+
+    newest_id: Optional[str] = None  # source-native ID, e.g. a tweet ID
+    newest_ts: Optional[float] = None  # epoch seconds of the newest item
+
+
+def _id_is_newer(candidate: str, current: Optional[str]) -> bool:
+    """Tweet IDs are numeric snowflakes, so compare them as integers when possible."""
+    if current is None:
+        return True
+    try:
+        return int(candidate) > int(current)
+    except ValueError:
+        return candidate > current
+
+
+class CrawlState:
+    """
+    SQLite-backed store of the newest item seen per (source, query).
+
+    Recurring crawls read the mark before fetching and only ask for newer
+    content, then advance it with what they got. Marks only ever move
+    forward. Safe to share between threads.
+
+    Usage:
+        with CrawlState() as state:
+            mark = state.get("twitter", "dating text")
+            ...
+            state.advance("twitter", "dating text", newest_id=..., newest_ts=...)
+    """
+
+    def __init__(self, path: str = DEFAULT_STATE_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS high_water_marks (
+                    source TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    newest_id TEXT,
+                    newest_ts REAL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (source, query)
+                )
+                """)
+
+    def get(self, source: str, query: str) -> HighWaterMark:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT newest_id, newest_ts FROM high_water_marks"
+                " WHERE source = ? AND query = ?",
+                (source, query),
+            ).fetchone()
+        return HighWaterMark(*row) if row else HighWaterMark()
+
+    def advance(
+        self,
+        source: str,
+        query: str,
+        newest_id: Optional[str] = None,
+        newest_ts: Optional[float] = None,
+    ) -> HighWaterMark:
+        """Move the mark forward to newest_id/newest_ts where they are newer."""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT newest_id, newest_ts FROM high_water_marks"
+                " WHERE source = ? AND query = ?",
+                (source, query),
+            ).fetchone()
+            mark = HighWaterMark(*row) if row else HighWaterMark()
+            if newest_id is not None and _id_is_newer(newest_id, mark.newest_id):
+                mark.newest_id = newest_id
+            if newest_ts is not None and (
+                mark.newest_ts is None or newest_ts > mark.newest_ts
+            ):
+                mark.newest_ts = newest_ts
+            self._conn.execute(
+                """
+                INSERT INTO high_water_marks (source, query, newest_id, newest_ts, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (source, query) DO UPDATE SET
+                    newest_id = excluded.newest_id,
+                    newest_ts = excluded.newest_ts,
+                    updated_at = excluded.updated_at
+                """,
+                (source, query, mark.newest_id, mark.newest_ts, time.time()),
+            )
+        return mark
+
+    def reset(self, source: Optional[str] = None, query: Optional[str] = None):
+        """Forget marks, all of them or those of one source and/or query."""
+        clauses, params = [], []
+        if source is not None:
+            clauses.append("source = ?")
+            params.append(source)
+        if query is not None:
+            clauses.append("query = ?")
+            params.append(query)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM high_water_marks{where}", params)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
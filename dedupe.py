@@ -0,0 +1,270 @@
+import hashlib
+import math
+import random
+import re
+import sqlite3
+import threading
+from array import array
+from typing import Iterable, Iterator, Optional
+
+DEFAULT_DEDUPE_PATH = "dedupe.sqlite3"
+EXPECTED_ITEMS = 1_000_000
+BLOOM_ERROR_RATE = 0.001
+COMMIT_EVERY = 500
+
+# MinHash near-duplicate detection: 64 hashes split into 8 bands of 8 rows,
+# so texts with a Jaccard similarity around 0.77 and up become candidates
+NUM_PERM = 64
+BANDS = 8
+NEAR_DUPLICATE_THRESHOLD = 0.8
+SHINGLE_WORDS = 3
+# Shorter texts ("lol", "this!") match each other too easily to compare
+MIN_NEAR_DUPLICATE_WORDS = 8
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_WORD = re.compile(r"\w+")
+# Fixed seed: signatures are persisted, so the permutations must never change
+_rng = random.Random(20240601)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings.
+
+    "not in" answers are always right; "in" answers are wrong with roughly
+    error_rate probability once capacity items were added.
+    """
+
+    def __init__(
+        self, capacity: int = EXPECTED_ITEMS, error_rate: float = BLOOM_ERROR_RATE
+    ):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value: str) -> Iterator[int]:
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, value: str):
+        for position in self._positions(value):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(value)
+        )
+
+
+def shingles(text: str, size: int = SHINGLE_WORDS) -> set[str]:
+    """Lowercased word n-grams of text."""
+    words = _WORD.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash(text: str) -> Optional[array]:
+    """MinHash signature of text, or None if it is too short to compare."""
+    if len(_WORD.findall(text)) < MIN_NEAR_DUPLICATE_WORDS:
+        return None
+    hashes = [_hash64(shingle) for shingle in shingles(text)]
+    return array(
+        "Q",
+        (min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS),
+    )
+
+
+def similarity(a: array, b: array) -> float:
+    """Estimated Jaccard similarity of the texts behind two signatures."""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+class MinHashIndex:
+    """LSH index of MinHash signatures for finding near-duplicate texts."""
+
+    def __init__(self, threshold: float = NEAR_DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        self._rows = NUM_PERM // BANDS
+        self._buckets: list[dict] = [{} for _ in range(BANDS)]
+        self._signatures: dict[str, array] = {}
+
+    def _bands(self, signature: array) -> Iterator[tuple]:
+        for band in range(BANDS):
+            start = band * self._rows
+            yield band, tuple(signature[start : start + self._rows])
+
+    def add(self, key: str, signature: array):
+        self._signatures[key] = signature
+        for band, rows in self._bands(signature):
+            self._buckets[band].setdefault(rows, []).append(key)
+
+    def query(self, signature: array) -> Optional[str]:
+        """Key of an indexed text similar to signature's, if there is one."""
+        checked = set()
+        for band, rows in self._bands(signature):
+            for key in self._buckets[band].get(rows, ()):
+                if key in checked:
+                    continue
+                checked.add(key)
+                if similarity(signature, self._signatures[key]) >= self.threshold:
+                    return key
+        return None
+
+
+class DedupeIndex:
+    """
+    Persistent index of items already collected, across sources and runs.
+
+    Items are keyed on their source-native ID (Reddit submission/comment ID,
+    tweet ID, Threads pk). The keys live in SQLite with an in-memory Bloom
+    filter in front, so the common case, a new item, is answered without a
+    query. With near_duplicates, item content is also MinHashed to catch
+    the same text posted under another ID, e.g. cross-posts.
+
+    Usage:
+        with DedupeIndex() as index:
+            new_items = list(index.filter(items))
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_DEDUPE_PATH,
+        expected_items: int = EXPECTED_ITEMS,
+        error_rate: float = BLOOM_ERROR_RATE,
+        near_duplicates: bool = False,
+        threshold: float = NEAR_DUPLICATE_THRESHOLD,
+    ):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.bloom = BloomFilter(expected_items, error_rate)
+        self.near_index = MinHashIndex(threshold) if near_duplicates else None
+        self.duplicates = 0
+        self.near_duplicates = 0
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS seen_items (
+                    source TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    PRIMARY KEY (source, id)
+                ) WITHOUT ROWID
+                """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS signatures (
+                    source TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    signature BLOB NOT NULL,
+                    PRIMARY KEY (source, id)
+                ) WITHOUT ROWID
+                """)
+        for source, item_id in self._conn.execute("SELECT source, id FROM seen_items"):
+            self.bloom.add(f"{source}:{item_id}")
+        if self.near_index is not None:
+            for source, item_id, blob in self._conn.execute(
+                "SELECT source, id, signature FROM signatures"
+            ):
+                signature = array("Q")
+                signature.frombytes(blob)
+                self.near_index.add(f"{source}:{item_id}", signature)
+
+    def _seen(self, source: str, item_id: str) -> bool:
+        if f"{source}:{item_id}" not in self.bloom:
+            return False
+        return (
+            self._conn.execute(
+                "SELECT 1 FROM seen_items WHERE source = ? AND id = ?",
+                (source, item_id),
+            ).fetchone()
+            is not None
+        )
+
+    def _record(self, source: str, item_id: str, signature: Optional[array]):
+        self.bloom.add(f"{source}:{item_id}")
+        self._conn.execute(
+            "INSERT OR IGNORE INTO seen_items (source, id) VALUES (?, ?)",
+            (source, item_id),
+        )
+        if signature is not None:
+            self.near_index.add(f"{source}:{item_id}", signature)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO signatures (source, id, signature)"
+                " VALUES (?, ?, ?)",
+                (source, item_id, signature.tobytes()),
+            )
+        self._pending += 1
+        if self._pending >= COMMIT_EVERY:
+            self._conn.commit()
+            self._pending = 0
+
+    def seen(self, source: str, item_id: str) -> bool:
+        """True if this ID was added before."""
+        with self._lock:
+            return self._seen(source, str(item_id))
+
+    def add(self, source: str, item_id, content: Optional[str] = None) -> bool:
+        """
+        Record an item and return True if it is new.
+
+        Items without an ID can't be matched exactly, so they only count as
+        duplicates if near-duplicate detection finds their content.
+        """
+        with self._lock:
+            if item_id is not None:
+                item_id = str(item_id)
+                if self._seen(source, item_id):
+                    self.duplicates += 1
+                    return False
+            signature = None
+            if self.near_index is not None and content:
+                signature = minhash(content)
+                if signature is not None and self.near_index.query(signature):
+                    self.near_duplicates += 1
+                    if item_id is not None:
+                        self._record(source, item_id, None)
+                    return False
+            if item_id is not None:
+                self._record(source, item_id, signature)
+            return True
+
+    def add_item(self, item) -> bool:
+        """add() for a SocialMediaData."""
+        return self.add(item.source, item.id, item.content)
+
+    def filter(self, items: Iterable) -> Iterator:
+        """Yield only the SocialMediaData items not collected before."""
+        for item in items:
+            if self.add_item(item):
+                yield item
+
+    def flush(self):
+        with self._lock:
+            self._conn.commit()
+            self._pending = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,197 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from importlib.util import find_spec
+from typing import Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+import metrics
+import rate_limit
+import response_cache
+
+# Timeouts in seconds; any value can be overridden per request with timeout=...
+DEFAULT_TIMEOUT = httpx.Timeout(15.0, connect=5.0)
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+POOL_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20)
+
+# HTTP/2 needs the optional h2 package; fall back to HTTP/1.1 keep-alive without it
+HTTP2_AVAILABLE = find_spec("h2") is not None
+
+_client: Optional[httpx.Client] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> httpx.Client:
+    """Return the process-wide pooled client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = httpx.Client(
+                    http2=HTTP2_AVAILABLE,
+                    timeout=DEFAULT_TIMEOUT,
+                    limits=POOL_LIMITS,
+                    follow_redirects=True,
+                )
+    return _client
+
+
+def close_client():
+    """Close the shared client and its pooled connections."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Parse a Retry-After header given either as seconds or as an HTTP date."""
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt))
+
+
+def _metric_labels(url: str, rate_limit_key: Optional[str]) -> tuple[str, str]:
+    """(source, endpoint) a request is recorded under: twitter:search_recent -> twitter, search_recent."""
+    if rate_limit_key:
+        source, _, endpoint = rate_limit_key.partition(":")
+        return source, endpoint or source
+    host = urlsplit(url).hostname or ""
+    return host, host
+
+
+def request(
+    method: str,
+    url: str,
+    *,
+    max_retries: int = MAX_RETRIES,
+    rate_limit_key: Optional[str] = None,
+    credential: Optional[str] = None,
+    **kwargs,
+) -> httpx.Response:
+    """
+    Send a request through the shared client, retrying on 429/5xx and network errors.
+
+    Args:
+        method (str): HTTP method.
+        url (str): Request URL.
+        max_retries (int): Retries after the first attempt.
+        rate_limit_key (str): Endpoint name in the shared rate_limit scheduler.
+            When given, each attempt waits for a token and the response's
+            rate-limit headers update the bucket.
+        credential (str): Token the request is made with, so each credential
+            gets its own bucket.
+        **kwargs: Passed through to httpx.Client.request (params, headers, timeout, ...).
+
+    Returns:
+        httpx.Response: The last response received. Non-retryable error
+        statuses are returned as-is for the caller to handle.
+
+    Every attempt is recorded in metrics: latency, status, body size and,
+    when it is retried, the reason.
+    """
+    client = get_client()
+    source, endpoint = _metric_labels(url, rate_limit_key)
+    attempt = 0
+    while True:
+        if rate_limit_key:
+            rate_limit.scheduler.acquire(rate_limit_key, credential)
+        start = time.perf_counter()
+        try:
+            response = client.request(method, url, **kwargs)
+        except httpx.TransportError as e:
+            metrics.record_request(
+                source, endpoint, "error", time.perf_counter() - start
+            )
+            if attempt >= max_retries:
+                raise
+            metrics.record_retry(source, endpoint, type(e).__name__)
+            time.sleep(_backoff_delay(attempt))
+            attempt += 1
+            continue
+        metrics.record_request(
+            source,
+            endpoint,
+            response.status_code,
+            time.perf_counter() - start,
+            len(response.content),
+        )
+
+        if rate_limit_key:
+            rate_limit.scheduler.update_from_headers(
+                rate_limit_key, response.headers, credential
+            )
+        if response.status_code not in RETRY_STATUSES or attempt >= max_retries:
+            return response
+
+        delay = retry_after_seconds(response)
+        if delay is None and response.status_code == 429:
+            delay = rate_limit.reset_delay(response.headers)
+            if delay is not None and rate_limit_key:
+                # A 429 means the quota is spent, whatever remaining says:
+                # pause the bucket until the reset, acquire() does the waiting
+                rate_limit.scheduler.update(
+                    rate_limit_key, 0, time.time() + delay, credential=credential
+                )
+                delay = 0.0
+        if delay is None:
+            delay = _backoff_delay(attempt)
+        else:
+            # Add a little jitter so parallel workers don't retry in lockstep
+            delay += random.uniform(0, BACKOFF_BASE)
+        metrics.record_retry(source, endpoint, response.status_code)
+        response.close()
+        time.sleep(delay)
+        attempt += 1
+
+
+def get(url: str, *, use_cache: bool = True, **kwargs) -> httpx.Response:
+    """
+    GET through the shared client. See request() for the keyword arguments.
+
+    While response_cache is enabled, 200 responses are cached under the
+    rate_limit_key (or the host) and the URL's params, and a fresh cached
+    body is returned without touching the network or the rate budget.
+    Pass use_cache=False to always go to the network.
+    """
+    cache = response_cache.get_cache() if use_cache else None
+    if cache is None:
+        return request("GET", url, **kwargs)
+
+    namespace = kwargs.get("rate_limit_key") or urlsplit(url).hostname
+    params = kwargs.get("params")
+    body = cache.get(namespace, url, params)
+    if body is not None:
+        metrics.inc("cache_hits_total", namespace=namespace)
+        return httpx.Response(
+            200,
+            content=body,
+            headers={"x-cache": "hit"},
+            request=httpx.Request("GET", url, params=params),
+        )
+    response = request("GET", url, **kwargs)
+    if response.status_code == 200:
+        cache.put(namespace, url, params, response.content)
+    return response
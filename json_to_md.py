@@ -1,97 +1,267 @@
+import argparse
+import glob
+import hashlib
+import html
 import json
+import os
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+
+from tqdm import tqdm
+
+# Literal \uXXXX escapes left in the text: a surrogate pair (emoji and other
+# non-BMP characters) or a single BMP escape
+# (no re.IGNORECASE: it would stop the engine from searching for the literal prefix)
+UNICODE_ESCAPE_PATTERN = re.compile(
+    r"\\u(?:([dD][89abAB][0-9a-fA-F]{2})\\u([dD][c-fC-F][0-9a-fA-F]{2})|([0-9a-fA-F]{4}))"
+)
+# HTML entities such as &amp; &#39; or &#x200B;
+HTML_ENTITY_PATTERN = re.compile(
+    r"&(?:#[0-9]+|#[xX][0-9a-fA-F]+|[A-Za-z][A-Za-z0-9]*);"
+)
+# Either of the two, so one pass decodes both and decoded text is never rescanned
+FORMATTING_PATTERN = re.compile(
+    f"{UNICODE_ESCAPE_PATTERN.pattern}|{HTML_ENTITY_PATTERN.pattern}"
+)
+# The only escape that decodes to the start of an entity
+AMPERSAND_ESCAPE = "\\u0026"
+
+# Decoded characters that are dropped instead of kept
+DROPPED_CHARACTERS = {
+    "\u200b": "",  # Reddit's zero-width space line break marker
+}
+
+
+@lru_cache(maxsize=4096)
+def _decode_unicode_escape_text(escape):
+    high, low, single = UNICODE_ESCAPE_PATTERN.fullmatch(escape).groups()
+    if high:
+        code_point = 0x10000 + ((int(high, 16) - 0xD800) << 10)
+        decoded = chr(code_point + int(low, 16) - 0xDC00)
+    else:
+        code_point = int(single, 16)
+        if 0xD800 <= code_point <= 0xDFFF:
+            # Half of a surrogate pair without its partner can't be decoded
+            return ""
+        decoded = chr(code_point)
+    return DROPPED_CHARACTERS.get(decoded, decoded)
+
+
+@lru_cache(maxsize=4096)
+def _decode_html_entity_text(entity):
+    decoded = html.unescape(entity)
+    return DROPPED_CHARACTERS.get(decoded, decoded)
+
+
+# The same few emoji and entities repeat across posts, so decoding is memoized
+def _decode_unicode_escape(match):
+    return _decode_unicode_escape_text(match.group(0))
+
+
+def _decode_html_entity(match):
+    return _decode_html_entity_text(match.group(0))
+
+
+def _decode_formatting(match):
+    text = match.group(0)
+    if text[0] == "\\":
+        return _decode_unicode_escape_text(text)
+    return _decode_html_entity_text(text)
 
 
 def clean_reddit_formatting(text):
     """
     Clean Reddit-specific formatting from the text.
+
+    Decodes literal \\uXXXX escapes (including surrogate-pair emoji) and
+    HTML entities, and drops zero-width spaces. What one decodes to is
+    never decoded again: \\u0026amp; becomes &amp;, not &. Escapes are
+    decoded before entities, so only an escaped & could be decoded twice;
+    text containing one takes a single pass of the combined pattern.
+    Otherwise each pattern runs on its own, only when its fixed first
+    character occurs in the text, which lets the regex engine skip ahead
+    to candidates.
     """
-    # Replace Reddit's line break marker
-    text = text.replace("&#x200B;", "")
-
-    # Replace encoded emojis with their Unicode equivalents
-    emoji_map = {
-        "\\ud83e\\udd70": "🥰",
-        "\\ud83d\\ude0d": "😍",
-        "\\ud83d\\ude18": "😘",
-        "\\ud83d\\ude0f": "😏",
-        "\\ud83d\\ude09": "😉",
-        "\\u2764\\ufe0f": "❤️",
-        "\\ud83d\\udd25": "🔥",
-        "\\ud83c\\udf46": "🍆",
-    }
+    if "\\" in text:
+        if AMPERSAND_ESCAPE in text:
+            return FORMATTING_PATTERN.sub(_decode_formatting, text)
+        text = UNICODE_ESCAPE_PATTERN.sub(_decode_unicode_escape, text)
+    if "&" in text:
+        text = HTML_ENTITY_PATTERN.sub(_decode_html_entity, text)
+    return text
 
-    for encoded, unicode in emoji_map.items():
-        text = text.replace(encoded, unicode)
 
-    # Remove any remaining escape sequences
-    text = re.sub(r"\\[a-z0-9]{4}", "", text)
+def clean_reddit_formatting_batch(texts):
+    """
+    Clean a list of texts, see clean_reddit_formatting.
+    """
+    return [clean_reddit_formatting(text) for text in texts]
 
-    return text
 
+READ_CHUNK_SIZE = 1 << 20
+WRITE_BUFFER_SIZE = 1 << 20
 
-def json_to_markdown(json_data):
+
+def post_to_markdown(post):
     """
-    Convert JSON data to markdown format.
+    Convert a single post to its markdown block.
     """
     markdown_content = []
 
-    for post in json_data:
-        print(post)
-        print("post--------------")
-        # Add title as main heading
-        if "title" in post:
-            markdown_content.append(f"# {post['title']}\n")
-
-        # Add content if available
-        if "content" in post:
-            # Clean the content
-            content = clean_reddit_formatting(post["content"])
-            markdown_content.append(content)
-
-        # Add source URL if available
-        if "url" in post:
-            markdown_content.append(f"\n\nSource: {post['url']}\n")
-
-        # Add metadata if available
-        if "is_relevant" in post:
-            markdown_content.append(
-                f"\nRelevance: {'Yes' if post['is_relevant'] else 'No'}"
-            )
+    # Add title as main heading
+    if "title" in post:
+        markdown_content.append(f"# {post['title']}\n")
+
+    # Add content if available
+    if "content" in post:
+        # Clean the content
+        content = clean_reddit_formatting(post["content"])
+        markdown_content.append(content)
+
+    # Add source URL if available
+    if "url" in post:
+        markdown_content.append(f"\n\nSource: {post['url']}\n")
+
+    # Add metadata if available
+    if "is_relevant" in post:
+        markdown_content.append(
+            f"\nRelevance: {'Yes' if post['is_relevant'] else 'No'}"
+        )
 
-        if "relevance_score" in post:
-            markdown_content.append(f"Relevance Score: {post['relevance_score']}")
+    if "relevance_score" in post:
+        markdown_content.append(f"Relevance Score: {post['relevance_score']}")
 
-        # Add separator between posts
-        markdown_content.append("\n---\n")
+    # Add separator between posts
+    markdown_content.append("\n---\n")
 
     return "\n".join(markdown_content)
 
 
-def convert_file(input_file, output_file):
+def json_to_markdown(json_data):
+    """
+    Convert JSON data to markdown format.
     """
-    Convert a JSON file to a markdown file.
+    return "\n".join(post_to_markdown(post) for post in json_data)
+
+
+def _iter_json_array(f, chunk_size=READ_CHUNK_SIZE):
+    """
+    Yield the elements of a top-level JSON array one at a time.
+
+    Only the current element and one read chunk are held in memory.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+    started = False
+
+    while True:
+        # Skip whitespace and separators, reading more input when needed
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            buffer, pos = f.read(chunk_size), 0
+            eof = not buffer
+
+        if pos >= len(buffer):
+            raise json.JSONDecodeError("Unexpected end of JSON array", buffer, pos)
+        if not started:
+            if buffer[pos] != "[":
+                raise json.JSONDecodeError("Expected a JSON array", buffer, pos)
+            started = True
+            pos += 1
+            continue
+        if buffer[pos] == "]":
+            return
+
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+            # A number or literal ending exactly at the chunk edge may be cut off
+            complete = end < len(buffer) or eof
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            complete = False
+
+        if not complete:
+            more = f.read(chunk_size)
+            eof = not more
+            buffer, pos = buffer[pos:] + more, 0
+            # Grow reads for elements larger than a chunk to avoid re-parsing too often
+            chunk_size *= 2
+            continue
+
+        yield item
+        pos = end
+        chunk_size = max(READ_CHUNK_SIZE, chunk_size // 2)
+
+
+def iter_posts(input_file):
+    """
+    Yield posts from a JSON array file or a JSONL file (one post per line).
 
     Args:
-        input_file (str): Path to input JSON file
-        output_file (str): Path to output markdown file
+        input_file (str): Path to a .json or .jsonl file
     """
-    try:
-        # Read JSON file
-        with open(input_file, "r", encoding="utf-8") as f:
-            json_data = json.load(f)
+    with open(input_file, "r", encoding="utf-8") as f:
+        first = ""
+        while not first:
+            ch = f.read(1)
+            if not ch:
+                return
+            if not ch.isspace():
+                first = ch
+        f.seek(0)
+
+        if first == "[":
+            yield from _iter_json_array(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
 
-        print(f"Successfully read {input_file}")
-        print(f"Converting {len(json_data)} posts to markdown...")
 
-        # Convert to markdown
-        markdown_content = json_to_markdown(json_data)
+def convert_file(input_file, output_file, show_progress=True):
+    """
+    Convert a JSON or JSONL file to a markdown file.
+
+    Posts are read, converted and written one at a time, so memory use does
+    not grow with the input size.
+
+    Args:
+        input_file (str): Path to input JSON array or JSONL file
+        output_file (str): Path to output markdown file
+        show_progress (bool): Show a progress bar on stderr
 
-        # Write markdown file
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(markdown_content)
+    Returns:
+        int: Number of posts converted
+    """
+    try:
+        count = 0
+        with open(
+            output_file, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE
+        ) as out, tqdm(
+            desc=f"Converting {input_file}",
+            unit=" posts",
+            disable=not show_progress,
+        ) as progress:
+            for post in iter_posts(input_file):
+                # Posts are separated the same way json_to_markdown joins them
+                if count:
+                    out.write("\n")
+                out.write(post_to_markdown(post))
+                count += 1
+                progress.update()
 
-        print(f"Successfully converted {input_file} to {output_file}")
+        print(
+            f"Successfully converted {count} posts from {input_file} to {output_file}"
+        )
+        return count
 
     except json.JSONDecodeError as e:
         print(f"Error parsing JSON: {e}")
@@ -101,6 +271,312 @@ def convert_file(input_file, output_file):
         raise
 
 
+INPUT_EXTENSIONS = (".json", ".jsonl")
+# No .json extension, so it isn't picked up when output_dir is also an input
+MANIFEST_NAME = ".json_to_md_manifest"
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def file_hash(path):
+    """
+    SHA-256 of a file's content, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def expand_inputs(patterns):
+    """
+    Resolve files, directories and glob patterns to a sorted list of input files.
+
+    Directories contribute their *.json and *.jsonl files (not recursive).
+    Literal paths are kept as given, even if they don't exist.
+    """
+    files = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for name in os.listdir(pattern):
+                if name.endswith(INPUT_EXTENSIONS):
+                    files.add(os.path.join(pattern, name))
+        elif glob.has_magic(pattern):
+            files.update(
+                path
+                for path in glob.glob(pattern, recursive=True)
+                if os.path.isfile(path)
+            )
+        else:
+            files.add(pattern)
+    return sorted(os.path.abspath(path) for path in files)
+
+
+def _output_stems(input_files):
+    """
+    Output file stem per input; inputs sharing a name get a short path hash added.
+    """
+    stems = {path: os.path.splitext(os.path.basename(path))[0] for path in input_files}
+    counts = {}
+    for stem in stems.values():
+        counts[stem] = counts.get(stem, 0) + 1
+    for path, stem in stems.items():
+        if counts[stem] > 1:
+            stems[path] = f"{stem}-{hashlib.sha1(path.encode()).hexdigest()[:8]}"
+    return stems
+
+
+def convert_file_sharded(input_file, output_dir, stem, posts_per_shard=0):
+    """
+    Convert one input to markdown, splitting the output every posts_per_shard posts.
+
+    Args:
+        input_file (str): Path to input JSON array or JSONL file
+        output_dir (str): Directory for the markdown files
+        stem (str): Output file name without extension
+        posts_per_shard (int): Posts per output file; 0 writes a single file
+
+    Returns:
+        list: (output path, post count) for each file written
+    """
+    if not posts_per_shard:
+        output_file = os.path.join(output_dir, f"{stem}.md")
+        return [
+            (output_file, convert_file(input_file, output_file, show_progress=False))
+        ]
+
+    shards = []
+    out = None
+    count = 0
+    try:
+        for post in iter_posts(input_file):
+            if count == 0:
+                path = os.path.join(output_dir, f"{stem}-{len(shards) + 1:05d}.md")
+                out = open(path, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE)
+                shards.append([path, 0])
+            else:
+                out.write("\n")
+            out.write(post_to_markdown(post))
+            count += 1
+            shards[-1][1] = count
+            if count == posts_per_shard:
+                out.close()
+                out, count = None, 0
+    finally:
+        if out is not None:
+            out.close()
+    return [tuple(shard) for shard in shards]
+
+
+def _export_one(input_file, entry, output_dir, stem, posts_per_shard, force=False):
+    """
+    Process pool worker: hash one input and convert it unless it is current.
+
+    Returns:
+        dict: The input's new manifest entry, or None if it was skipped
+    """
+    content_hash = file_hash(input_file)
+    if not force and _is_current(
+        entry, content_hash, output_dir, stem, posts_per_shard
+    ):
+        return None
+    _remove_outputs(entry, output_dir)
+    outputs = convert_file_sharded(input_file, output_dir, stem, posts_per_shard)
+    return {
+        "hash": content_hash,
+        "stem": stem,
+        "posts_per_shard": posts_per_shard,
+        "outputs": [
+            {"path": os.path.relpath(path, output_dir), "posts": posts}
+            for path, posts in outputs
+        ],
+        "posts": sum(posts for _, posts in outputs),
+    }
+
+
+def _load_manifest(output_dir):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_manifest(output_dir, manifest):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _is_current(entry, content_hash, output_dir, stem, posts_per_shard):
+    """
+    Whether an input's outputs are up to date: same content, written with the
+    same stem and sharding, and still on disk.
+    """
+    return (
+        entry is not None
+        and entry.get("hash") == content_hash
+        and entry.get("stem") == stem
+        and entry.get("posts_per_shard") == posts_per_shard
+        and all(
+            os.path.exists(os.path.join(output_dir, output["path"]))
+            for output in entry["outputs"]
+        )
+    )
+
+
+def _remove_outputs(entry, output_dir):
+    """
+    Delete the files a previous conversion wrote, so no stale shards remain.
+    """
+    for output in (entry or {}).get("outputs", []):
+        path = os.path.join(output_dir, output["path"])
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def write_index(index_file, input_files, manifest, output_dir):
+    """
+    Write a markdown index linking every input to its output files.
+    """
+    index_dir = os.path.dirname(os.path.abspath(index_file))
+    with open(index_file, "w", encoding="utf-8") as f:
+        f.write("# Export index\n\n")
+        for input_file in input_files:
+            entry = manifest.get(input_file)
+            if entry is None:
+                continue
+            f.write(f"## {os.path.basename(input_file)} ({entry['posts']} posts)\n\n")
+            for output in entry["outputs"]:
+                link = os.path.relpath(
+                    os.path.join(output_dir, output["path"]), index_dir
+                )
+                f.write(f"- [{output['path']}]({link}) ({output['posts']} posts)\n")
+            f.write("\n")
+
+
+def export_files(
+    patterns,
+    output_dir,
+    jobs=None,
+    posts_per_shard=0,
+    index_file=None,
+    force=False,
+):
+    """
+    Convert many JSON/JSONL files to markdown in a process pool.
+
+    Inputs whose content hash, output stem and posts_per_shard match the
+    manifest in output_dir (and whose outputs still exist) are skipped unless
+    force is set. Otherwise the files of the previous conversion are deleted
+    before converting again. Hashing happens in the workers too. Inputs that
+    don't exist are reported and counted as failed.
+
+    Args:
+        patterns (list): Files, directories or glob patterns
+        output_dir (str): Directory for the markdown files and the manifest
+        jobs (int): Worker processes (default: CPU count)
+        posts_per_shard (int): Posts per output file; 0 writes one file per input
+        index_file (str): Optional path of a merged markdown index
+        force (bool): Convert every input even if unchanged
+
+    Returns:
+        dict: Counts of converted, skipped and failed inputs
+    """
+    input_files = []
+    failed = 0
+    for input_file in expand_inputs(patterns):
+        if os.path.isfile(input_file):
+            input_files.append(input_file)
+        else:
+            print(f"Input not found: {input_file}")
+            failed += 1
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = _load_manifest(output_dir)
+    stems = _output_stems(input_files)
+
+    converted = skipped = 0
+    with ProcessPoolExecutor(max_workers=jobs) as pool, tqdm(
+        total=len(input_files), desc="Exporting", unit=" files"
+    ) as progress:
+        futures = {
+            pool.submit(
+                _export_one,
+                input_file,
+                manifest.get(input_file),
+                output_dir,
+                stems[input_file],
+                posts_per_shard,
+                force,
+            ): input_file
+            for input_file in input_files
+        }
+        for future in as_completed(futures):
+            input_file = futures[future]
+            try:
+                entry = future.result()
+            except Exception as e:
+                print(f"Failed to convert {input_file}: {e}")
+                # The worker may have removed the old outputs already
+                manifest.pop(input_file, None)
+                failed += 1
+            else:
+                if entry is None:
+                    skipped += 1
+                else:
+                    manifest[input_file] = entry
+                    converted += 1
+            progress.update()
+
+    _save_manifest(output_dir, manifest)
+    if index_file:
+        write_index(index_file, input_files, manifest, output_dir)
+
+    print(f"Converted {converted}, skipped {skipped} unchanged, {failed} failed")
+    return {"converted": converted, "skipped": skipped, "failed": failed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Convert JSON/JSONL post dumps to markdown."
+    )
+    parser.add_argument(
+        "inputs", nargs="*", help="Input files, directories or glob patterns"
+    )
+    parser.add_argument(
+        "-o", "--output-dir", default="markdown", help="Output directory"
+    )
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Worker processes")
+    parser.add_argument(
+        "--posts-per-shard",
+        type=int,
+        default=0,
+        help="Split outputs every N posts (default: one file per input)",
+    )
+    parser.add_argument("--index", help="Write a merged markdown index to this file")
+    parser.add_argument(
+        "--force", action="store_true", help="Reconvert inputs even if unchanged"
+    )
+    args = parser.parse_args(argv)
+
+    if not args.inputs:
+        # Example usage
+        convert_file("reddit_relevance_output.json", "output.md")
+        return
+
+    result = export_files(
+        args.inputs,
+        args.output_dir,
+        jobs=args.jobs,
+        posts_per_shard=args.posts_per_shard,
+        index_file=args.index,
+        force=args.force,
+    )
+    if result["failed"]:
+        sys.exit(1)
+
+
 if __name__ == "__main__":
-    # Example usage
-    convert_file("reddit_relevance_output.json", "output.md")
+    main()
@@ -0,0 +1,411 @@
+import bisect
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+PREFIX = "social_apis_"
+DEFAULT_METRICS_PATH = "metrics.prom"
+EXPORT_INTERVAL = 15.0  # seconds between snapshots written by enable()
+# Histogram buckets in seconds, from a cached parse to a slow page load
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Queries become label values; keep long ones from bloating every series
+MAX_LABEL_LENGTH = 64
+
+COUNTER, GAUGE, HISTOGRAM = "counter", "gauge", "histogram"
+
+# name -> (type, help) of what the fetchers record
+METRICS = {
+    "requests_total": (COUNTER, "HTTP requests sent, by response status"),
+    "request_seconds": (HISTOGRAM, "Latency of single HTTP requests"),
+    "response_bytes_total": (COUNTER, "Response body bytes received"),
+    "retries_total": (COUNTER, "Requests retried, by reason"),
+    "cache_hits_total": (COUNTER, "Responses served from response_cache"),
+    "rate_limit_remaining": (GAUGE, "Requests left in the current rate-limit window"),
+    "rate_limit_reset_timestamp": (
+        GAUGE,
+        "Epoch seconds when the rate-limit window resets",
+    ),
+    "rate_limit_wait_seconds": (HISTOGRAM, "Time spent waiting for a rate-limit token"),
+    "parse_seconds": (HISTOGRAM, "Time spent parsing responses and pages"),
+    "items_total": (COUNTER, "Items fetched"),
+    "items_per_second": (GAUGE, "Items per second of the last fetch"),
+    "fetch_seconds": (HISTOGRAM, "Duration of whole fetches of one source and query"),
+    "fetch_errors_total": (COUNTER, "Fetches of one source and query that failed"),
+    "stage_seconds": (HISTOGRAM, "Duration of traced stages, see metrics.span"),
+}
+
+# Labels every sample recorded in this context gets, see tags()
+_tags: contextvars.ContextVar[dict] = contextvars.ContextVar("metrics_tags", default={})
+
+
+def _label_value(value) -> str:
+    return str(value)[:MAX_LABEL_LENGTH]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> Iterator[tuple[float, int]]:
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+        yield float("inf"), self.count
+
+
+class MetricsRegistry:
+    """
+    In-memory counters, gauges and histograms, rendered as Prometheus text.
+
+    Samples are keyed by metric name and label set. Every recorded sample
+    is also handed to the registered hooks as (type, name, value, labels),
+    so they can be forwarded elsewhere, e.g. to StatsD, as they happen.
+
+    Usage:
+        registry = MetricsRegistry()
+        registry.inc("requests_total", source="twitter", status="200")
+        registry.write("metrics.prom")
+    """
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS, spans: bool = False):
+        self.buckets = buckets
+        self.spans = spans
+        self.hooks: list[Callable[[str, str, float, dict], None]] = []
+        self._counters: dict[tuple, float] = {}
+        self._gauges: dict[tuple, float] = {}
+        self._histograms: dict[tuple, _Histogram] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple:
+        return name, tuple(sorted((k, _label_value(v)) for k, v in labels.items()))
+
+    def _notify(self, kind: str, name: str, value: float, labels: dict):
+        for hook in self.hooks:
+            hook(kind, name, value, labels)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        self._notify(COUNTER, name, value, labels)
+
+    def set(self, name: str, value: float, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+        self._notify(GAUGE, name, value, labels)
+
+    def observe(self, name: str, value: float, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(self.buckets)
+            histogram.observe(value)
+        self._notify(HISTOGRAM, name, value, labels)
+
+    def value(self, name: str, **labels) -> Optional[float]:
+        """Current value of a counter or gauge, or the count of a histogram."""
+        key = self._key(name, labels)
+        with self._lock:
+            if key in self._histograms:
+                return self._histograms[key].count
+            return self._counters.get(key, self._gauges.get(key))
+
+    def render(self, openmetrics: bool = False) -> str:
+        """
+        Text exposition of every sample.
+
+        Prometheus text format by default; with openmetrics, the
+        OpenMetrics format (counter families without _total, # EOF).
+        """
+        with self._lock:
+            # Copy histogram state while it can't change
+            samples = [
+                (COUNTER, name, labels, value)
+                for (name, labels), value in self._counters.items()
+            ]
+            samples += [
+                (GAUGE, name, labels, value)
+                for (name, labels), value in self._gauges.items()
+            ]
+            samples += [
+                (HISTOGRAM, name, labels, (list(h.cumulative()), h.sum))
+                for (name, labels), h in self._histograms.items()
+            ]
+        series = {}
+        for kind, name, labels, value in samples:
+            series.setdefault((name, kind), []).append((labels, value))
+
+        lines = []
+        for (name, kind), entries in sorted(series.items()):
+            full_name = PREFIX + name
+            family = full_name
+            if openmetrics and kind == COUNTER:
+                family = full_name.removesuffix("_total")
+            help_text = METRICS.get(name, (kind, name.replace("_", " ")))[1]
+            lines.append(f"# HELP {family} {help_text}")
+            lines.append(f"# TYPE {family} {kind}")
+            for labels, value in sorted(entries, key=lambda e: e[0]):
+                if kind != HISTOGRAM:
+                    lines.append(
+                        f"{full_name}{_format_labels(labels)} {_format_number(value)}"
+                    )
+                    continue
+                buckets, total = value
+                for bound, count in buckets:
+                    le = f'le="{_format_number(bound)}"'
+                    lines.append(
+                        f"{full_name}_bucket{_format_labels(labels, le)} {count}"
+                    )
+                lines.append(
+                    f"{full_name}_sum{_format_labels(labels)} {_format_number(total)}"
+                )
+                lines.append(
+                    f"{full_name}_count{_format_labels(labels)} {buckets[-1][1]}"
+                )
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str, openmetrics: bool = False):
+        """
+        Write a snapshot to path, replacing the previous one atomically.
+
+        Suits node_exporter's textfile collector, which may read the file
+        at any moment.
+        """
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render(openmetrics))
+        os.replace(tmp_path, path)
+
+
+class FileExporter:
+    """Writes a registry snapshot to a file every interval seconds, and once more on stop."""
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        path: str = DEFAULT_METRICS_PATH,
+        openmetrics: bool = False,
+        interval: float = EXPORT_INTERVAL,
+    ):
+        self.registry = registry
+        self.path = path
+        self.openmetrics = openmetrics
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> "FileExporter":
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.export()
+
+    def export(self):
+        self.registry.write(self.path, self.openmetrics)
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.export()
+
+
+# Process-wide registry the fetchers record into; off (and free) until enabled
+_registry: Optional[MetricsRegistry] = None
+_exporter: Optional[FileExporter] = None
+
+
+def enable(
+    path: Optional[str] = None,
+    openmetrics: bool = False,
+    interval: float = EXPORT_INTERVAL,
+    spans: bool = False,
+    buckets: tuple = DEFAULT_BUCKETS,
+) -> MetricsRegistry:
+    """
+    Start recording metrics from every fetcher.
+
+    With a path, a snapshot is written there every interval seconds and on
+    disable(). With spans, span() timings are recorded too.
+    """
+    global _registry, _exporter
+    disable()
+    _registry = MetricsRegistry(buckets, spans=spans)
+    if path:
+        _exporter = FileExporter(_registry, path, openmetrics, interval).start()
+    return _registry
+
+
+def disable():
+    """Stop recording, writing a final snapshot if enable() was given a path."""
+    global _registry, _exporter
+    if _exporter is not None:
+        _exporter.stop()
+        _exporter = None
+    _registry = None
+
+
+def get_registry() -> Optional[MetricsRegistry]:
+    return _registry
+
+
+@contextmanager
+def tags(**labels):
+    """
+    Add labels, e.g. source and query, to everything recorded inside the block.
+
+    Tags follow the context, so they reach asyncio tasks and to_thread
+    workers started inside the block. Don't enter it across a yield.
+    """
+    token = _tags.set({**_tags.get(), **labels})
+    try:
+        yield
+    finally:
+        _tags.reset(token)
+
+
+def _tagged(labels: dict) -> dict:
+    return {**_tags.get(), **labels}
+
+
+def inc(name: str, value: float = 1, **labels):
+    if _registry is not None:
+        _registry.inc(name, value, **_tagged(labels))
+
+
+def set_gauge(name: str, value: float, **labels):
+    if _registry is not None:
+        _registry.set(name, value, **_tagged(labels))
+
+
+def observe(name: str, value: float, **labels):
+    if _registry is not None:
+        _registry.observe(name, value, **_tagged(labels))
+
+
+def record_request(
+    source: str, endpoint: str, status, seconds: float, size: int = 0, **labels
+):
+    """One HTTP request attempt; status is the HTTP status, or "error" if none came."""
+    if _registry is None:
+        return
+    labels = _tagged({"source": source, "endpoint": endpoint, **labels})
+    _registry.inc("requests_total", status=str(status), **labels)
+    _registry.observe("request_seconds", seconds, **labels)
+    if size:
+        _registry.inc("response_bytes_total", size, **labels)
+
+
+def record_retry(source: str, endpoint: str, reason):
+    if _registry is not None:
+        _registry.inc(
+            "retries_total",
+            **_tagged({"source": source, "endpoint": endpoint, "reason": str(reason)}),
+        )
+
+
+def record_rate_limit(
+    endpoint: str, credential: str, remaining: float, reset_at: Optional[float]
+):
+    """Quota an API reported; not tagged, a credential's budget spans queries."""
+    if _registry is None:
+        return
+    _registry.set(
+        "rate_limit_remaining", remaining, endpoint=endpoint, credential=credential
+    )
+    if reset_at:
+        _registry.set(
+            "rate_limit_reset_timestamp",
+            reset_at,
+            endpoint=endpoint,
+            credential=credential,
+        )
+
+
+def record_wait(endpoint: str, seconds: float):
+    """Time a request was held back by the rate_limit scheduler."""
+    if _registry is not None:
+        _registry.observe("rate_limit_wait_seconds", seconds, endpoint=endpoint)
+
+
+def record_items(count: int, seconds: float, **labels):
+    """Items one fetch produced and how long it took."""
+    if _registry is None:
+        return
+    labels = _tagged(labels)
+    _registry.inc("items_total", count, **labels)
+    _registry.observe("fetch_seconds", seconds, **labels)
+    if seconds > 0:
+        _registry.set("items_per_second", count / seconds, **labels)
+
+
+@contextmanager
+def timed(name: str, **labels):
+    """Observe the block's duration into histogram name."""
+    if _registry is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+@contextmanager
+def span(stage: str, **labels):
+    """
+    Time one stage of a fetch into stage_seconds, when spans are enabled.
+
+    Usage:
+        with metrics.span("reddit.comments"):
+            ...
+    """
+    if _registry is None or not _registry.spans:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe("stage_seconds", time.perf_counter() - start, stage=stage, **labels)
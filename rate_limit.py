@@ -0,0 +1,275 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from typing import Mapping, Optional
+
+import metrics
+
+# Default quotas as (requests, window in seconds), used until the API reports its own
+DEFAULT_LIMITS = {
+    "twitter:search_recent": (450, 15 * 60),
+    "twitter:search_all": (300, 15 * 60),
+    "twitter:tweets": (300, 15 * 60),
+    "reddit": (100, 60),
+    "threads:keyword_search": (2200, 24 * 60 * 60),
+}
+FALLBACK_LIMIT = (60, 60)
+# How many requests a bucket may send back-to-back before spacing kicks in
+DEFAULT_BURST = 5
+# Endpoints with a tighter burst and a floor on the spacing of requests, in
+# seconds, whatever quota is left; full-archive search allows 1 request per second
+BURSTS = {"twitter:search_all": 1}
+MIN_INTERVALS = {"twitter:search_all": 1.0}
+
+
+def credential_key(credential: Optional[str]) -> str:
+    """Short, non-reversible key for a token so secrets never end up in bucket names."""
+    if not credential:
+        return "default"
+    return hashlib.sha256(credential.encode()).hexdigest()[:12]
+
+
+class TokenBucket:
+    """
+    Token bucket for one endpoint and credential.
+
+    The refill rate starts at limit/period. Once the API reports remaining
+    quota and a reset time, the remaining requests are spread evenly up to
+    the reset, so the window is fully used without running into 429s. With
+    min_interval, the rate never exceeds one request per min_interval
+    seconds, for endpoints that also limit requests per second.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        period: float,
+        burst: int = DEFAULT_BURST,
+        min_interval: float = 0.0,
+    ):
+        self.limit = limit
+        self.period = period
+        self.capacity = max(1, min(burst, limit))
+        self.max_rate = 1 / min_interval if min_interval > 0 else float("inf")
+        self.rate = self._clamp(limit / period)
+        self.tokens = float(self.capacity)
+        self.remaining = None
+        self.reset_at = None
+        self._updated = time.time()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _clamp(self, rate: float) -> float:
+        return min(rate, self.max_rate)
+
+    def _refill(self, now: float):
+        if now > self._updated:
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+
+    def reserve(self) -> float:
+        """Take one token and return how many seconds to wait before using it."""
+        with self._lock:
+            now = time.time()
+            if self.reset_at is not None and now >= self.reset_at:
+                # New window: go back to the nominal rate
+                self.rate = self._clamp(self.limit / self.period)
+                self.reset_at = None
+                self.remaining = None
+            start = max(now, self._paused_until)
+            self._refill(start)
+            self.tokens -= 1
+            wait = start - now
+            if self.tokens < 0:
+                wait += -self.tokens / self.rate
+            return wait
+
+    def acquire(self) -> float:
+        """Block until a request may be sent; returns the seconds waited."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self) -> float:
+        """Wait until a request may be sent without blocking the event loop."""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def update(self, remaining: float, reset_at: float, limit: Optional[int] = None):
+        """
+        Adjust the bucket to the quota reported by the API.
+
+        Args:
+            remaining (float): Requests left in the current window.
+            reset_at (float): Epoch seconds when the window resets.
+            limit (int): Window size in requests, if the API reports it.
+        """
+        with self._lock:
+            now = time.time()
+            if limit:
+                self.limit = limit
+                self.capacity = max(1, min(self.capacity, limit))
+            self.remaining = remaining
+            self.reset_at = reset_at
+            window = max(reset_at - now, 0.001)
+            if remaining < 1:
+                # Out of quota: nothing more until the window resets
+                self._paused_until = reset_at
+                self.tokens = min(self.tokens, 0.0)
+                self._updated = max(self._updated, reset_at)
+                self.rate = self._clamp(self.limit / self.period)
+                self.reset_at = None
+            else:
+                self.rate = self._clamp(remaining / window)
+                self.tokens = min(self.tokens, remaining)
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "remaining": self.remaining,
+                "reset_at": self.reset_at,
+                "rate_per_second": self.rate,
+                "paused_until": self._paused_until or None,
+            }
+
+
+class RateLimitScheduler:
+    """Registry of token buckets, one per (endpoint, credential)."""
+
+    def __init__(self, limits: Optional[Mapping[str, tuple]] = None):
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self.min_intervals = dict(MIN_INTERVALS)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def configure(
+        self,
+        endpoint: str,
+        limit: int,
+        period: float,
+        min_interval: Optional[float] = None,
+    ):
+        """
+        Set the nominal quota for an endpoint, and optionally the minimum
+        seconds between its requests. Existing buckets are replaced.
+        """
+        with self._lock:
+            self.limits[endpoint] = (limit, period)
+            if min_interval is not None:
+                self.min_intervals[endpoint] = min_interval
+            for key in [k for k in self._buckets if k[0] == endpoint]:
+                del self._buckets[key]
+
+    def bucket(self, endpoint: str, credential: Optional[str] = None) -> TokenBucket:
+        key = (endpoint, credential_key(credential))
+        with self._lock:
+            if key not in self._buckets:
+                limit, period = self.limits.get(endpoint, FALLBACK_LIMIT)
+                self._buckets[key] = TokenBucket(
+                    limit,
+                    period,
+                    BURSTS.get(endpoint, DEFAULT_BURST),
+                    self.min_intervals.get(endpoint, 0.0),
+                )
+            return self._buckets[key]
+
+    def acquire(self, endpoint: str, credential: Optional[str] = None):
+        metrics.record_wait(endpoint, self.bucket(endpoint, credential).acquire())
+
+    async def acquire_async(self, endpoint: str, credential: Optional[str] = None):
+        metrics.record_wait(
+            endpoint, await self.bucket(endpoint, credential).acquire_async()
+        )
+
+    def update(
+        self,
+        endpoint: str,
+        remaining: float,
+        reset_at: float,
+        credential: Optional[str] = None,
+        limit: Optional[int] = None,
+    ):
+        self.bucket(endpoint, credential).update(remaining, reset_at, limit)
+        metrics.record_rate_limit(
+            endpoint, credential_key(credential), remaining, reset_at
+        )
+
+    def update_from_headers(
+        self,
+        endpoint: str,
+        headers: Mapping[str, str],
+        credential: Optional[str] = None,
+    ):
+        """Read Twitter, Reddit or Meta (Threads) rate-limit headers, if present."""
+        quota = parse_rate_limit_headers(headers, self.bucket(endpoint, credential))
+        if quota is not None:
+            remaining, reset_at, limit = quota
+            self.update(
+                endpoint, remaining, reset_at, credential=credential, limit=limit
+            )
+
+    def status(self) -> dict:
+        """Current view of every bucket, keyed by "endpoint/credential"."""
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {
+            f"{endpoint}/{cred}": bucket.status()
+            for (endpoint, cred), bucket in buckets.items()
+        }
+
+
+def parse_rate_limit_headers(
+    headers: Mapping[str, str], bucket: Optional[TokenBucket] = None
+) -> Optional[tuple]:
+    """
+    Extract (remaining, reset_at, limit) from response headers.
+
+    Twitter sends x-rate-limit-remaining/-reset (epoch) and -limit. Reddit
+    sends x-ratelimit-remaining and x-ratelimit-reset (seconds from now).
+    Meta's Graph API, used by Threads, sends X-App-Usage with percentages of
+    the quota used; it is turned into a remaining count using the bucket's
+    nominal limit and window.
+    """
+    now = time.time()
+    try:
+        if "x-rate-limit-remaining" in headers:
+            limit = headers.get("x-rate-limit-limit")
+            return (
+                float(headers["x-rate-limit-remaining"]),
+                float(headers["x-rate-limit-reset"]),
+                int(limit) if limit else None,
+            )
+        if "x-ratelimit-remaining" in headers:
+            return (
+                float(headers["x-ratelimit-remaining"]),
+                now + float(headers["x-ratelimit-reset"]),
+                None,
+            )
+        if "x-app-usage" in headers and bucket is not None:
+            usage = json.loads(headers["x-app-usage"])
+            used = max(float(v) for v in usage.values()) if usage else 0.0
+            remaining = bucket.limit * max(0.0, 100.0 - used) / 100.0
+            return remaining, now + bucket.period, None
+    except (KeyError, TypeError, ValueError):
+        return None
+    return None
+
+
+def reset_delay(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds until the reported window resets, or None if the headers don't say."""
+    quota = parse_rate_limit_headers(headers)
+    if quota is None:
+        return None
+    return max(0.0, quota[1] - time.time())
+
+
+# Shared by every fetcher in the process
+scheduler = RateLimitScheduler()
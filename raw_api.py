@@ -1,73 +1,360 @@
-import requests
-from datetime import datetime, timedelta
-from dotenv import load_dotenv
-import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+import time
 
-load_dotenv()
-
-# Twitter API credentials
-BEARER_TOKEN = os.getenv("TWITTER_BEARER_TOKEN")
-if not BEARER_TOKEN or BEARER_TOKEN == "None":
-    raise ValueError("BEARER_TOKEN not found in environment variables")
+import http_client
+import metrics
+from twitter_auth import bearer_token
 
 
 def create_headers():
     """Create headers for API request"""
-    return {"Authorization": f"Bearer {BEARER_TOKEN}"}
+    return {"Authorization": f"Bearer {bearer_token()}"}
+
+
+SEARCH_RECENT_URL = "https://api.twitter.com/2/tweets/search/recent"
+SEARCH_ALL_URL = "https://api.twitter.com/2/tweets/search/all"
+TWEETS_LOOKUP_URL = "https://api.twitter.com/2/tweets"
+PAGE_SIZE_MIN = 10
+PAGE_SIZE_MAX = 100  # API v2 has a max of 100 per request
+ARCHIVE_PAGE_SIZE_MAX = 500  # full-archive search allows up to 500
+LOOKUP_BATCH_SIZE = 100  # IDs per tweet lookup request
+TWEET_FIELDS = "id,text,author_id,created_at"
+USER_FIELDS = "id,name,username,verified"
+# Backfill defaults, see backfill
+BACKFILL_WINDOW = timedelta(days=1)
+BACKFILL_WORKERS = 4
+# search_all rejects an end_time less than 10 seconds ago
+ARCHIVE_END_MARGIN = timedelta(seconds=30)
+# Recent search only reaches this far back, since_id included
+RECENT_SEARCH_DAYS = 7
+# Tweet IDs are snowflakes: milliseconds since this epoch, shifted left 22 bits
+TWITTER_EPOCH_MS = 1288834974657
+
+
+class BackfillError(RuntimeError):
+    """Some backfill windows failed; the others were still collected."""
+
+    def __init__(self, windows):
+        self.windows = windows
+        super().__init__(f"{len(windows)} backfill window(s) failed: {windows}")
+
+
+def _format_time(value):
+    """Format a datetime as the RFC 3339 UTC timestamp the API expects."""
+    return value.isoformat("T") + "Z"
+
+
+def _utc_naive(value):
+    """A datetime as naive UTC; aware values are converted, naive ones taken as UTC."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
 
+def tweet_time(tweet_id):
+    """Naive UTC time a tweet was created, decoded from its ID."""
+    return datetime.utcfromtimestamp(((int(tweet_id) >> 22) + TWITTER_EPOCH_MS) / 1000)
 
-def fetch_tweets(keyword, max_results=10, start_days_ago=7):
+
+def since_id_in_window(tweet_id):
+    """
+    Whether recent search still accepts tweet_id as since_id.
+
+    The API answers 400 for a since_id older than its 7-day window. The
+    start of the window is rounded like _window_start, which leaves an
+    hour of margin for the request to go out.
+    """
+    return tweet_time(tweet_id) >= _window_start(RECENT_SEARCH_DAYS)
+
+
+def _window_start(days_ago):
+    """
+    Naive UTC start of a window reaching days_ago back, rounded up to the hour.
+
+    Rounding keeps the request params, and so the response cache key, stable
+    for an hour. Rounding up keeps the start inside the 7-day limit of the
+    recent search endpoint.
+    """
+    start = datetime.utcnow() - timedelta(days=days_ago)
+    return start.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+
+
+def iter_tweets(
+    keyword,
+    total=100,
+    start_days_ago=RECENT_SEARCH_DAYS,
+    end_time=None,
+    since_id=None,
+):
+    """
+    Yield tweets for a keyword, following next_token page by page.
+
+    Parameters:
+        keyword (str): The keyword to search for.
+        total (int): Stop after this many tweets. None follows every page.
+        start_days_ago (int): How many days ago to start the search. Ignored
+            when since_id is given.
+        end_time (datetime): Optional upper bound of the window, UTC, naive
+            or aware.
+        since_id (str): Only return tweets newer than this ID, for
+            incremental runs. It must be within the last 7 days, see
+            since_id_in_window.
+
+    Yields:
+        dict: One tweet per item, as soon as its page arrives.
+
+    Raises:
+        httpx.HTTPStatusError: A page failed after http_client's retries,
+            so the results so far are incomplete.
+    """
+    params = {
+        "query": f"{keyword} lang:en",
+        "tweet.fields": TWEET_FIELDS,
+    }
+    if since_id:
+        params["since_id"] = since_id
+    else:
+        params["start_time"] = _format_time(_window_start(start_days_ago))
+    if end_time:
+        params["end_time"] = _format_time(_utc_naive(end_time))
+
+    yield from _iter_search(
+        SEARCH_RECENT_URL,
+        "twitter:search_recent",
+        params,
+        total,
+        PAGE_SIZE_MAX,
+        keyword,
+    )
+
+
+def _tweet_fields(tweet):
+    return {
+        "id": tweet["id"],
+        "text": tweet["text"],
+        "author_id": tweet["author_id"],
+        "created_at": tweet["created_at"],
+    }
+
+
+def _iter_search(url, rate_limit_key, params, total, page_size_max, keyword):
+    """Page through a search endpoint with next_token, see iter_tweets."""
+    fetched = 0
+    started = time.perf_counter()
+    try:
+        while total is None or fetched < total:
+            remaining = page_size_max if total is None else total - fetched
+            params["max_results"] = max(PAGE_SIZE_MIN, min(remaining, page_size_max))
+
+            with metrics.tags(query=keyword):
+                response = http_client.get(
+                    url,
+                    headers=create_headers(),
+                    params=params,
+                    rate_limit_key=rate_limit_key,
+                    credential=bearer_token(),
+                )
+            # A failed page must not pass for the end of the results
+            response.raise_for_status()
+
+            with metrics.timed("parse_seconds", source="twitter", query=keyword):
+                json_response = response.json()
+            for tweet in json_response.get("data", []):
+                if total is not None and fetched >= total:
+                    return
+                yield _tweet_fields(tweet)
+                fetched += 1
+
+            next_token = json_response.get("meta", {}).get("next_token")
+            if not next_token:
+                return
+            params["next_token"] = next_token
+    finally:
+        metrics.record_items(
+            fetched, time.perf_counter() - started, source="twitter", query=keyword
+        )
+
+
+def iter_archive(keyword, start_time, end_time, total=None):
+    """
+    Yield tweets for a keyword from the full archive, between two times.
+
+    Uses the full-archive search endpoint (Academic/Pro access), paged
+    ARCHIVE_PAGE_SIZE_MAX tweets at a time under the twitter:search_all
+    rate-limit bucket. start_time is inclusive, end_time exclusive; both
+    are UTC, naive or aware.
+    """
+    params = {
+        "query": f"{keyword} lang:en",
+        "tweet.fields": TWEET_FIELDS,
+        "start_time": _format_time(_utc_naive(start_time)),
+        "end_time": _format_time(_utc_naive(end_time)),
+    }
+    yield from _iter_search(
+        SEARCH_ALL_URL,
+        "twitter:search_all",
+        params,
+        total,
+        ARCHIVE_PAGE_SIZE_MAX,
+        keyword,
+    )
+
+
+def split_windows(start_time, end_time, window=BACKFILL_WINDOW):
+    """
+    Split [start_time, end_time) into consecutive windows of at most window each.
+
+    Returns:
+        list: (start, end) pairs of naive UTC datetimes, oldest first.
+    """
+    start_time, end_time = _utc_naive(start_time), _utc_naive(end_time)
+    if start_time >= end_time:
+        raise ValueError("start_time must be before end_time")
+    if window <= timedelta(0):
+        raise ValueError("window must be positive")
+    windows = []
+    while start_time < end_time:
+        window_end = min(start_time + window, end_time)
+        windows.append((start_time, window_end))
+        start_time = window_end
+    return windows
+
+
+def backfill(
+    keyword,
+    start_time,
+    end_time=None,
+    window=BACKFILL_WINDOW,
+    max_workers=BACKFILL_WORKERS,
+    total_per_window=None,
+):
+    """
+    Collect a keyword's tweets over a long period, several time windows at once.
+
+    The period is split into windows (see split_windows) and up to
+    max_workers of them are paged through iter_archive concurrently. All
+    workers share the app's twitter:search_all bucket in the rate_limit
+    scheduler, so together they stay within its quota; the extra workers
+    keep it busy while others wait on responses. Windows don't overlap, so
+    no tweet is returned twice.
+
+    Parameters:
+        keyword (str): The keyword to search for.
+        start_time (datetime): Start of the period, UTC.
+        end_time (datetime): End of the period, UTC. Defaults to just
+            before now.
+        window (timedelta): Length of each window.
+        max_workers (int): Windows fetched at the same time.
+        total_per_window (int): Stop each window after this many tweets.
+            None follows every page.
+
+    Yields:
+        dict: Tweets, a whole window at a time, in the order windows finish.
+
+    Raises:
+        BackfillError: Once every other window is done, if any window
+            failed. Its windows attribute lists the (start, end) bounds to
+            retry.
+    """
+    if end_time is None:
+        end_time = datetime.utcnow() - ARCHIVE_END_MARGIN
+
+    def fetch_window(bounds):
+        with metrics.span("twitter.backfill_window", query=keyword):
+            return list(iter_archive(keyword, *bounds, total=total_per_window))
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    failed = []
+    try:
+        futures = {
+            executor.submit(fetch_window, bounds): bounds
+            for bounds in split_windows(start_time, end_time, window)
+        }
+        for future in as_completed(futures):
+            # One failed window shouldn't throw away the others' quota
+            try:
+                tweets = future.result()
+            except Exception as e:
+                print(f"Backfill window {futures[future]} failed: {e}")
+                failed.append(futures[future])
+                continue
+            yield from tweets
+    finally:
+        # Don't start the remaining windows once the caller stops
+        executor.shutdown(wait=False, cancel_futures=True)
+    if failed:
+        raise BackfillError(sorted(failed))
+
+
+def lookup_tweets(ids, batch_size=LOOKUP_BATCH_SIZE):
+    """
+    Hydrate tweets by ID, batch_size (at most 100) per request.
+
+    Authors come with the tweets through expansions=author_id, so no
+    separate user lookups are needed. IDs the API doesn't return (deleted
+    or protected tweets) are skipped, and repeated IDs are looked up once.
+
+    Parameters:
+        ids (Iterable[str]): Tweet IDs.
+        batch_size (int): IDs per request.
+
+    Yields:
+        dict: The tweet fields iter_tweets gives, plus "author", the user
+        dict (id, name, username, verified) or None if it wasn't included.
+
+    Raises:
+        httpx.HTTPStatusError: A batch failed after http_client's retries.
+    """
+    ids = list(dict.fromkeys(str(tweet_id) for tweet_id in ids))
+    batch_size = max(1, min(batch_size, LOOKUP_BATCH_SIZE))
+    for start in range(0, len(ids), batch_size):
+        response = http_client.get(
+            TWEETS_LOOKUP_URL,
+            headers=create_headers(),
+            params={
+                "ids": ",".join(ids[start : start + batch_size]),
+                "tweet.fields": TWEET_FIELDS,
+                "expansions": "author_id",
+                "user.fields": USER_FIELDS,
+            },
+            rate_limit_key="twitter:tweets",
+            credential=bearer_token(),
+        )
+        response.raise_for_status()
+
+        with metrics.timed("parse_seconds", source="twitter"):
+            json_response = response.json()
+        users = {
+            user["id"]: user
+            for user in json_response.get("includes", {}).get("users", [])
+        }
+        for tweet in json_response.get("data", []):
+            yield {**_tweet_fields(tweet), "author": users.get(tweet["author_id"])}
+
+
+def fetch_tweets(keyword, max_results=10, start_days_ago=7, since_id=None):
     """
     Fetch tweets based on a keyword using Twitter API v2.
 
     Parameters:
         keyword (str): The keyword to search for.
-        max_results (int): Number of tweets to fetch per request (max 100 for basic track).
+        max_results (int): Total number of tweets to fetch, paging as needed.
         start_days_ago (int): How many days ago to start the search.
+        since_id (str): Only return tweets newer than this ID.
 
     Returns:
         list: A list of tweets matching the query.
     """
     try:
-        # Define the search parameters
-        start_time = (datetime.utcnow() - timedelta(days=start_days_ago)).isoformat(
-            "T"
-        ) + "Z"
-
-        # API v2 endpoint
-        url = "https://api.twitter.com/2/tweets/search/recent"
-
-        # Query parameters
-        params = {
-            "query": f"{keyword} lang:en",
-            "max_results": min(max_results, 100),  # API v2 has a max of 100 per request
-            "start_time": start_time,
-            "tweet.fields": "id,text,author_id,created_at",
-        }
-
-        # Make the request
-        response = requests.get(url, headers=create_headers(), params=params)
-
-        if response.status_code != 200:
-            print(f"Error: {response.status_code}")
-            print(response.text)
-            return []
-
-        # Parse response
-        json_response = response.json()
-        tweets = []
-
-        if "data" in json_response:
-            for tweet in json_response["data"]:
-                tweets.append(
-                    {
-                        "id": tweet["id"],
-                        "text": tweet["text"],
-                        "author_id": tweet["author_id"],
-                        "created_at": tweet["created_at"],
-                    }
-                )
-        return tweets
+        return list(
+            iter_tweets(
+                keyword,
+                total=max_results,
+                start_days_ago=start_days_ago,
+                since_id=since_id,
+            )
+        )
 
     except Exception as e:
         print(f"Error: {e}")
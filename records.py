@@ -0,0 +1,136 @@
+import json
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Iterator, Optional
+
+from sinks import (
+    PARQUET_AVAILABLE,
+    arrow_column,
+    arrow_schema,
+    json_default,
+    record_schema,
+)
+
+
+def intern_fields(record, names: Iterable[str]):
+    """
+    Intern the given string fields of a frozen record in place.
+
+    Usernames, profile picture URLs and the like repeat across thousands
+    of records; interned, every record points at one shared copy. Meant
+    for __post_init__, hence object.__setattr__.
+    """
+    for name in names:
+        value = getattr(record, name)
+        if type(value) is str:
+            object.__setattr__(record, name, sys.intern(value))
+
+
+@dataclass(frozen=True, slots=True)
+class SocialMediaData:
+    id: str  # Source-native ID: submission/comment ID, tweet ID or Threads pk
+    type: str  # "post" or "comment"
+    title: Optional[str]  # Will be None for comments
+    url: str
+    author: str
+    content: str  # selftext for posts, body for comments
+    date: datetime
+    parent_id: Optional[str]  # Will be None for posts, post_id for comments
+    source: str = "reddit"  # "reddit", "twitter" or "threads"
+
+    def __post_init__(self):
+        # Repeated across many items of one crawl
+        intern_fields(self, ("type", "author", "parent_id", "source"))
+
+
+class RecordBatch:
+    """
+    Column-oriented container for records of one dataclass type.
+
+    Holds one list per field instead of one object per record, which
+    drops the per-record object overhead of large in-memory crawls and
+    hands columns straight to Arrow.
+
+    Usage:
+        batch = RecordBatch.from_records(posts)
+        table = batch.to_arrow()
+    """
+
+    def __init__(self, record_type):
+        self.record_type = record_type
+        self.schema = record_schema(record_type)
+        self.names = [name for name, _ in self.schema]
+        self.columns: dict[str, list] = {name: [] for name in self.names}
+
+    @classmethod
+    def from_records(cls, records: Iterable, record_type=None) -> "RecordBatch":
+        records = iter(records)
+        if record_type is None:
+            first = next(records, None)
+            if first is None:
+                raise ValueError("record_type is needed for an empty batch")
+            batch = cls(type(first))
+            batch.append(first)
+        else:
+            batch = cls(record_type)
+        batch.extend(records)
+        return batch
+
+    def append(self, record):
+        for name in self.names:
+            self.columns[name].append(getattr(record, name))
+
+    def extend(self, records: Iterable):
+        for record in records:
+            self.append(record)
+
+    def __len__(self) -> int:
+        return len(self.columns[self.names[0]])
+
+    def __getitem__(self, index: int):
+        """Rebuild the record at index."""
+        return self.record_type(
+            **{name: self.columns[name][index] for name in self.names}
+        )
+
+    def __iter__(self) -> Iterator:
+        record_type = self.record_type
+        for row in self._rows():
+            yield record_type(*row)
+
+    def _rows(self) -> Iterator[tuple]:
+        return zip(*(self.columns[name] for name in self.names))
+
+    def column(self, name: str) -> list:
+        return self.columns[name]
+
+    def to_dicts(self) -> list[dict]:
+        names = self.names
+        return [dict(zip(names, row)) for row in self._rows()]
+
+    def to_jsonl(self, path) -> int:
+        """Write one JSON object per record; returns the record count."""
+        names = self.names
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(
+                json.dumps(
+                    dict(zip(names, row)), default=json_default, ensure_ascii=False
+                )
+                + "\n"
+                for row in self._rows()
+            )
+        return len(self)
+
+    def to_arrow(self):
+        """pyarrow Table with the same typed columns ParquetSink writes."""
+        if not PARQUET_AVAILABLE:
+            raise ImportError("to_arrow needs pyarrow: pip install pyarrow")
+        import pyarrow as pa
+
+        schema = arrow_schema(self.schema)
+        arrays = [
+            arrow_column(self.columns[name], kind, field.type)
+            for (name, kind), field in zip(self.schema, schema)
+        ]
+        return pa.Table.from_arrays(arrays, schema=schema)
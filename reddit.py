@@ -1,8 +1,4 @@
-import praw
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
+import reddit_client
 
 
 def fetch_reddit_posts(
@@ -24,40 +20,37 @@ def fetch_reddit_posts(
     :param limit: Maximum number of posts to fetch (default: 10).
     :return: A list of posts with their titles and URLs.
     """
-    # Initialize Reddit API client
-    reddit = praw.Reddit(
-        client_id=os.getenv("REDDIT_CLIENT_ID"),
-        client_secret=os.getenv("REDDIT_CLIENT_SECRET"),
-        user_agent=os.getenv("REDDIT_USER_AGENT"),
-    )
+    # Pooled Reddit API client, ours alone until the block ends
+    with reddit_client.checkout() as reddit:
+        # Fetch posts
+        posts = []
+        for submission in reddit.subreddit(subreddit).search(
+            query=query, sort=sort, syntax=syntax, time_filter=time_filter, limit=limit
+        ):
+            # Get top-level comments, paced by the shared Reddit quota
+            reddit_client.acquire(reddit)
+            submission.comments.replace_more(limit=0)  # Remove MoreComments objects
+            reddit_client.sync_rate_limit(reddit)
+            comments = []
+            for comment in submission.comments[:5]:  # Get first 5 comments
+                comments.append(
+                    {
+                        "body": comment.body,
+                        "score": comment.score,
+                        "author": str(comment.author),
+                    }
+                )
 
-    # Fetch posts
-    posts = []
-    for submission in reddit.subreddit(subreddit).search(
-        query=query, sort=sort, syntax=syntax, time_filter=time_filter, limit=limit
-    ):
-        # Get top-level comments
-        submission.comments.replace_more(limit=0)  # Remove MoreComments objects
-        comments = []
-        for comment in submission.comments[:5]:  # Get first 5 comments
-            comments.append(
+            posts.append(
                 {
-                    "body": comment.body,
-                    "score": comment.score,
-                    "author": str(comment.author),
+                    "title": submission.title,
+                    "url": submission.url,
+                    "score": submission.score,
+                    "subreddit": submission.subreddit.display_name,
+                    "comments": comments,
                 }
             )
 
-        posts.append(
-            {
-                "title": submission.title,
-                "url": submission.url,
-                "score": submission.score,
-                "subreddit": submission.subreddit.display_name,
-                "comments": comments,
-            }
-        )
-
     return posts
 
 
@@ -0,0 +1,239 @@
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, Optional
+from urllib.parse import urlsplit
+
+import praw
+import prawcore
+from dotenv import load_dotenv
+
+import metrics
+import rate_limit
+
+# Extra credentials for the pool: REDDIT_CLIENT_ID_2, REDDIT_CLIENT_SECRET_2, ...
+MAX_EXTRA_CREDENTIALS = 16
+
+
+@dataclass(frozen=True)
+class RedditCredential:
+    client_id: str
+    client_secret: str
+    user_agent: str
+
+
+def credentials_from_env() -> list[RedditCredential]:
+    """
+    Read REDDIT_CLIENT_ID/SECRET/USER_AGENT plus any numbered extras.
+
+    REDDIT_CLIENT_ID_2 with REDDIT_CLIENT_SECRET_2 adds a second app, and so
+    on; numbered entries without their own user agent reuse the main one.
+    """
+    load_dotenv()
+    user_agent = os.getenv("REDDIT_USER_AGENT")
+    credentials = []
+    if os.getenv("REDDIT_CLIENT_ID"):
+        credentials.append(
+            RedditCredential(
+                os.getenv("REDDIT_CLIENT_ID"),
+                os.getenv("REDDIT_CLIENT_SECRET"),
+                user_agent,
+            )
+        )
+    for n in range(2, MAX_EXTRA_CREDENTIALS + 2):
+        client_id = os.getenv(f"REDDIT_CLIENT_ID_{n}")
+        if not client_id:
+            continue
+        credentials.append(
+            RedditCredential(
+                client_id,
+                os.getenv(f"REDDIT_CLIENT_SECRET_{n}"),
+                os.getenv(f"REDDIT_USER_AGENT_{n}", user_agent),
+            )
+        )
+    return credentials
+
+
+def _endpoint(url: str) -> str:
+    """Metrics endpoint of a Reddit API URL, without IDs or subreddit names."""
+    path = urlsplit(url).path.rstrip("/")
+    if path.endswith("/search"):
+        return "search"
+    if path.startswith("/comments/"):
+        return "comments"
+    return path.rsplit("/", 1)[-1] or "other"
+
+
+class TimedRequestor(prawcore.Requestor):
+    """prawcore Requestor recording every Reddit HTTP request in metrics."""
+
+    def request(self, method, url, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except prawcore.RequestException:
+            metrics.record_request(
+                "reddit", _endpoint(url), "error", time.perf_counter() - start
+            )
+            raise
+        metrics.record_request(
+            "reddit",
+            _endpoint(url),
+            response.status_code,
+            time.perf_counter() - start,
+            len(response.content),
+        )
+        return response
+
+
+class RedditClientPool:
+    """
+    Shared, lazily built PRAW clients, checked out by one caller at a time.
+
+    PRAW is not thread-safe: a client's HTTP session, OAuth token refresh
+    and rate limiter all run without locks. checkout() therefore lends each
+    caller a client of its own, picking credentials round-robin and
+    building another client for that credential when all of its clients
+    are in use. Returned clients are kept, so their OAuth tokens, HTTP
+    sessions and rate-limit views survive across searches. Clients send
+    their requests through TimedRequestor, so they show up in metrics.
+    Clients of one credential share its bucket in the rate_limit scheduler,
+    so together they stay within that app's quota.
+
+    Usage:
+        with reddit_client.checkout() as reddit:
+            for submission in reddit.subreddit("all").search("query"):
+                ...
+    """
+
+    def __init__(
+        self, credentials: Optional[list[RedditCredential]] = None, **reddit_kwargs
+    ):
+        """
+        :param credentials: Apps to use; read from the environment when omitted.
+        :param reddit_kwargs: Extra praw.Reddit settings for every client, e.g. timeout.
+        """
+        self._credentials = credentials
+        self._reddit_kwargs = {"requestor_class": TimedRequestor, **reddit_kwargs}
+        self._clients: dict[RedditCredential, list[praw.Reddit]] = {}
+        self._idle: dict[RedditCredential, list[praw.Reddit]] = {}
+        self._cycle = None
+        self._lock = threading.Lock()
+
+    @property
+    def credentials(self) -> list[RedditCredential]:
+        if self._credentials is None:
+            self._credentials = credentials_from_env()
+        return self._credentials
+
+    def _build(self, credential: RedditCredential) -> praw.Reddit:
+        return praw.Reddit(
+            client_id=credential.client_id,
+            client_secret=credential.client_secret,
+            user_agent=credential.user_agent,
+            **self._reddit_kwargs,
+        )
+
+    def _take(self) -> tuple[RedditCredential, praw.Reddit]:
+        with self._lock:
+            if self._cycle is None:
+                if not self.credentials:
+                    raise ValueError(
+                        "REDDIT_CLIENT_ID not found in environment variables"
+                    )
+                self._cycle = itertools.cycle(self.credentials)
+            credential = next(self._cycle)
+            idle = self._idle.setdefault(credential, [])
+            if idle:
+                return credential, idle.pop()
+        client = self._build(credential)
+        with self._lock:
+            self._clients.setdefault(credential, []).append(client)
+        return credential, client
+
+    @contextmanager
+    def checkout(self) -> Iterator[praw.Reddit]:
+        """A client for this caller alone until the block ends, built if none is free."""
+        credential, client = self._take()
+        try:
+            yield client
+        finally:
+            with self._lock:
+                self._idle[credential].append(client)
+
+    def status(self) -> list[dict]:
+        """
+        Rate-limit view of every credential.
+
+        remaining/used/reset_timestamp are what Reddit last reported to
+        that credential's clients, the latest report of any of them (None
+        before the first request); scheduler is the shared token bucket
+        pacing them all.
+        """
+        with self._lock:
+            clients = [(c, list(self._clients.get(c, []))) for c in self.credentials]
+        report = []
+        for credential, built in clients:
+            limits = max(
+                (client.auth.limits for client in built),
+                key=lambda seen: (
+                    seen.get("reset_timestamp") or 0,
+                    seen.get("used") or 0,
+                ),
+                default={},
+            )
+            report.append(
+                {
+                    "credential": rate_limit.credential_key(credential.client_id),
+                    "connected": bool(built),
+                    "clients": len(built),
+                    "remaining": limits.get("remaining"),
+                    "used": limits.get("used"),
+                    "reset_timestamp": limits.get("reset_timestamp"),
+                    "scheduler": rate_limit.scheduler.bucket(
+                        "reddit", credential.client_id
+                    ).status(),
+                }
+            )
+        return report
+
+
+def client_id(reddit: praw.Reddit) -> str:
+    return reddit.config.client_id
+
+
+def acquire(reddit: praw.Reddit):
+    """Wait for a request slot in this client's Reddit quota."""
+    rate_limit.scheduler.acquire("reddit", client_id(reddit))
+
+
+async def acquire_async(reddit: praw.Reddit):
+    await rate_limit.scheduler.acquire_async("reddit", client_id(reddit))
+
+
+def sync_rate_limit(reddit: praw.Reddit):
+    """Feed the quota PRAW last saw from Reddit's headers into the shared scheduler."""
+    limits = reddit.auth.limits
+    if limits.get("remaining") is not None and limits.get("reset_timestamp"):
+        rate_limit.scheduler.update(
+            "reddit",
+            limits["remaining"],
+            limits["reset_timestamp"],
+            credential=client_id(reddit),
+        )
+
+
+# Process-wide pool; reads the environment on first use, not at import
+pool = RedditClientPool()
+
+
+def checkout():
+    """Check a PRAW client out of the process-wide pool, see RedditClientPool.checkout."""
+    return pool.checkout()
+
+
+def rate_limit_status() -> list[dict]:
+    return pool.status()
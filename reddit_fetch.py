@@ -1,29 +1,270 @@
-import os
+import json
+import asyncio
+import time
 import praw
-from dotenv import load_dotenv
-from typing import Optional
+from praw.models import MoreComments
+from typing import Iterator, Optional
 from datetime import datetime
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 
-load_dotenv()
+import metrics
+import reddit_client
+import response_cache
+
+# SocialMediaData lives in records so crawl can use it without loading praw
+from records import SocialMediaData
 
 LIMIT = 2
 NUMBER_OF_COMMENTS = 2
-REDDIT_CLIENT_ID = os.getenv("REDDIT_CLIENT_ID")
-REDDIT_CLIENT_SECRET = os.getenv("REDDIT_CLIENT_SECRET")
-REDDIT_USER_AGENT = os.getenv("REDDIT_USER_AGENT")
+MAX_CONCURRENCY = 8
+# Comment harvesting defaults, see CommentHarvest
+MAX_COMMENT_DEPTH = 4
+MAX_COMMENTS_PER_POST = 500
+MORE_CHILDREN_BUDGET = 5
+MORE_CHILDREN_BATCH = 100  # /api/morechildren accepts up to 100 IDs per call
 
 
 @dataclass
-class SocialMediaData:
-    # id: str  # Unique identifier
-    type: str  # "post" or "comment"
-    title: Optional[str]  # Will be None for comments
-    url: str
-    author: str
-    content: str  # selftext for posts, body for comments
-    date: datetime
-    parent_id: Optional[str]  # Will be None for posts, post_id for comments
+class SearchProgress:
+    """
+    How far an incremental search got.
+
+    reached_mark is set once the "new" listing reached a submission created
+    at or before newer_than, so everything newer has been read. Results
+    served from response_cache leave it unset.
+    """
+
+    reached_mark: bool = False
+
+
+@dataclass
+class CommentHarvest:
+    """Limits for harvesting whole comment trees instead of a few top-level comments."""
+
+    max_depth: int = MAX_COMMENT_DEPTH  # 1 keeps top-level comments only
+    max_comments: int = MAX_COMMENTS_PER_POST
+    more_budget: int = MORE_CHILDREN_BUDGET  # /api/morechildren requests per post
+
+
+def _base36_id(fullname: str) -> str:
+    """Strip the type prefix off a fullname, t1_abc -> abc, as SocialMediaData IDs are stored."""
+    return fullname.split("_", 1)[-1]
+
+
+def _post_item(submission) -> SocialMediaData:
+    return SocialMediaData(
+        id=submission.id,
+        type="post",
+        title=submission.title,
+        url=submission.url,
+        author=str(submission.author),
+        content=submission.selftext,
+        date=datetime.fromtimestamp(submission.created_utc),
+        parent_id=None,
+    )
+
+
+def _comment_item(comment) -> SocialMediaData:
+    return SocialMediaData(
+        id=comment.id,
+        type="comment",
+        title=None,
+        url=f"https://reddit.com{comment.permalink}",
+        author=str(comment.author),
+        content=comment.body,
+        date=datetime.fromtimestamp(comment.created_utc),
+        # The submission for top-level comments, the comment replied to otherwise
+        parent_id=_base36_id(comment.parent_id),
+    )
+
+
+def iter_comments(
+    reddit: praw.Reddit, submission, harvest: CommentHarvest
+) -> Iterator[SocialMediaData]:
+    """
+    Stream a submission's comment tree, depth first, within harvest's limits.
+
+    The first request loads as much of the tree as Reddit returns at once.
+    The children hidden behind "load more comments" stubs are pooled across
+    stubs, shallowest first, and fetched MORE_CHILDREN_BATCH at a time
+    through /api/morechildren. PRAW's replace_more would make one call per
+    stub instead. At most harvest.more_budget such calls are made per
+    submission, each paced by the shared rate_limit scheduler. "Continue
+    this thread" stubs need a request each and are not followed.
+    """
+    submission.comment_limit = harvest.max_comments
+    depths = {submission.id: 0}
+    pending: list[tuple[int, str]] = []  # (depth, comment ID) behind stubs
+    emitted = 0
+
+    def walk(nodes) -> Iterator:
+        stack = list(reversed(nodes))
+        while stack:
+            node = stack.pop()
+            parent_depth = depths.get(_base36_id(node.parent_id))
+            if parent_depth is None:
+                # Parent was cut by the limits, or isn't in this batch
+                continue
+            depth = parent_depth + 1
+            if depth > harvest.max_depth:
+                continue
+            if isinstance(node, MoreComments):
+                pending.extend((depth, child) for child in node.children)
+                continue
+            depths[node.id] = depth
+            yield node
+            stack.extend(reversed(list(node.replies)))
+
+    for comment in walk(list(submission.comments)):
+        yield _comment_item(comment)
+        emitted += 1
+        if emitted >= harvest.max_comments:
+            return
+
+    calls = 0
+    while pending and calls < harvest.more_budget:
+        pending.sort()
+        batch = [child for _, child in pending[:MORE_CHILDREN_BATCH]]
+        del pending[:MORE_CHILDREN_BATCH]
+        reddit_client.acquire(reddit)
+        things = reddit.post(
+            "api/morechildren/",
+            data={
+                "children": ",".join(batch),
+                "link_id": submission.fullname,
+                "sort": submission.comment_sort,
+            },
+        )
+        reddit_client.sync_rate_limit(reddit)
+        calls += 1
+        if not isinstance(things, list):
+            continue
+        for thing in things:
+            thing.submission = submission
+        # Results are flat and in tree order, so parents come before replies
+        for comment in walk(things):
+            yield _comment_item(comment)
+            emitted += 1
+            if emitted >= harvest.max_comments:
+                return
+
+
+def _submission_items(
+    reddit: praw.Reddit,
+    submission,
+    number_of_comments: int,
+    harvest: Optional[CommentHarvest] = None,
+) -> list[SocialMediaData]:
+    """
+    Build the post item and its comment items for one submission.
+
+    Without harvest, only the first number_of_comments top-level comments
+    are kept; with it, the comment tree is harvested by iter_comments.
+    The comments are loaded before the post fields are read, so a lazy
+    submission (see extract_reddit_posts_async) is fetched once, with them.
+    """
+    with metrics.span("reddit.comments"):
+        if harvest is not None:
+            comments = list(iter_comments(reddit, submission, harvest))
+        else:
+            submission.comments.replace_more(limit=0)
+            comments = [
+                _comment_item(comment)
+                for comment in submission.comments[:number_of_comments]
+            ]
+    return [_post_item(submission), *comments]
+
+
+def _search_cache_entry(
+    query,
+    subreddit,
+    sort,
+    syntax,
+    time_filter,
+    number_of_comments,
+    limit,
+    newer_than,
+    harvest=None,
+) -> tuple[str, dict]:
+    """URL and params a search's results are cached under."""
+    params = {
+        "q": query,
+        "sort": sort,
+        "syntax": syntax,
+        "t": time_filter,
+        "limit": limit,
+        "comments": number_of_comments,
+        "newer_than": newer_than,
+    }
+    if harvest is not None:
+        params.update(asdict(harvest))
+    return f"https://www.reddit.com/r/{subreddit}/search", params
+
+
+def _cached_items(url: str, params: dict) -> Optional[list[SocialMediaData]]:
+    """
+    Items of an identical earlier search, if response_cache has them.
+
+    PRAW does its own HTTP, so Reddit results are cached as finished items
+    rather than as raw responses. Raises response_cache.CacheMiss in
+    offline mode.
+    """
+    cache = response_cache.get_cache()
+    if cache is None:
+        return None
+    body = cache.get("reddit", url, params)
+    if body is None:
+        return None
+    return [
+        SocialMediaData(**{**item, "date": datetime.fromisoformat(item["date"])})
+        for item in json.loads(body)
+    ]
+
+
+def _store_items(url: str, params: dict, items: list[SocialMediaData]):
+    cache = response_cache.get_cache()
+    if cache is not None:
+        body = json.dumps([asdict(item) for item in items], default=str)
+        cache.put("reddit", url, params, body.encode("utf-8"))
+
+
+def _search(
+    reddit,
+    query,
+    subreddit,
+    sort,
+    syntax,
+    time_filter,
+    limit,
+    newer_than=None,
+    progress=None,
+):
+    """
+    Iterate a subreddit search listing.
+
+    With newer_than (epoch seconds) the listing is sorted by "new" and
+    iteration stops at the first submission that isn't newer, so an
+    incremental run with limit=None pages through exactly what was posted
+    since the last one. Stopping there flags progress.reached_mark; a
+    listing that runs out first doesn't.
+    """
+    if newer_than is None:
+        return reddit.subreddit(subreddit).search(
+            query=query, sort=sort, syntax=syntax, time_filter=time_filter, limit=limit
+        )
+    listing = reddit.subreddit(subreddit).search(
+        query=query, sort="new", syntax=syntax, time_filter=time_filter, limit=limit
+    )
+
+    def newer(listing):
+        for submission in listing:
+            if submission.created_utc <= newer_than:
+                if progress is not None:
+                    progress.reached_mark = True
+                return
+            yield submission
+
+    return newer(listing)
 
 
 def extract_reddit_posts(
@@ -33,6 +274,10 @@ def extract_reddit_posts(
     syntax: str = "lucene",
     time_filter: str = "all",
     number_of_comments: int = NUMBER_OF_COMMENTS,
+    limit: Optional[int] = LIMIT,
+    newer_than: Optional[float] = None,
+    harvest: Optional[CommentHarvest] = None,
+    progress: Optional[SearchProgress] = None,
 ) -> list[SocialMediaData]:
     """
     Fetch posts from Reddit based on the given query and parameters.
@@ -42,59 +287,151 @@ def extract_reddit_posts(
     :param sort: Sorting method, e.g., "relevance", "hot", "top", "new", or "comments" (default: "relevance").
     :param syntax: Query syntax, e.g., "cloudsearch", "lucene", or "plain" (default: "lucene").
     :param time_filter: Time filter, e.g., "all", "day", "hour", "month", "week", or "year" (default: "all").
-    :param limit: Maximum number of posts to fetch (default: 10).
+    :param limit: Maximum number of posts to fetch, None for as many as Reddit lists (default: LIMIT).
+    :param newer_than: Only fetch posts created after this epoch timestamp; forces sort="new" (default: None).
+    :param harvest: Harvest comment trees within these limits instead of keeping number_of_comments top-level comments (default: None).
+    :param progress: Set reached_mark on it once a search with newer_than reaches an older post (default: None).
     :return: A list of posts with their titles and URLs.
     """
-    reddit = praw.Reddit(
-        client_id=REDDIT_CLIENT_ID,
-        client_secret=REDDIT_CLIENT_SECRET,
-        user_agent=REDDIT_USER_AGENT,
+    cache_url, cache_params = _search_cache_entry(
+        query,
+        subreddit,
+        sort,
+        syntax,
+        time_filter,
+        number_of_comments,
+        limit,
+        newer_than,
+        harvest,
     )
+    cached = _cached_items(cache_url, cache_params)
+    if cached is not None:
+        return cached
 
+    started = time.perf_counter()
     items = []
-    for submission in reddit.subreddit(subreddit).search(
-        query=query, sort=sort, syntax=syntax, time_filter=time_filter, limit=LIMIT
-    ):
-        # Add the post
-        items.append(
-            SocialMediaData(
-                # id=submission.id,
-                type="post",
-                title=submission.title,
-                url=submission.url,
-                author=str(submission.author),
-                content=submission.selftext,
-                date=datetime.fromtimestamp(submission.created_utc),
-                parent_id=None,
+    with reddit_client.checkout() as reddit, metrics.tags(query=query):
+        for submission in _search(
+            reddit,
+            query,
+            subreddit,
+            sort,
+            syntax,
+            time_filter,
+            limit,
+            newer_than,
+            progress,
+        ):
+            reddit_client.acquire(reddit)
+            items.extend(
+                _submission_items(reddit, submission, number_of_comments, harvest)
             )
-        )
+            reddit_client.sync_rate_limit(reddit)
+
+    _store_items(cache_url, cache_params, items)
+    metrics.record_items(
+        len(items), time.perf_counter() - started, source="reddit", query=query
+    )
+    return items
 
-        # Add the comments
-        submission.comments.replace_more(limit=0)
-        for comment in submission.comments[:number_of_comments]:
-            items.append(
-                SocialMediaData(
-                    # id=comment.id,
-                    type="comment",
-                    title=None,
-                    url=f"https://reddit.com{comment.permalink}",
-                    author=str(comment.author),
-                    content=comment.body,
-                    date=datetime.fromtimestamp(comment.created_utc),
-                    parent_id=submission.id,
+
+async def extract_reddit_posts_async(
+    query: str,
+    subreddit: str = "all",
+    sort: str = "relevance",
+    syntax: str = "lucene",
+    time_filter: str = "all",
+    number_of_comments: int = NUMBER_OF_COMMENTS,
+    limit: Optional[int] = LIMIT,
+    max_concurrency: int = MAX_CONCURRENCY,
+    newer_than: Optional[float] = None,
+    harvest: Optional[CommentHarvest] = None,
+    progress: Optional[SearchProgress] = None,
+) -> list[SocialMediaData]:
+    """
+    Concurrent variant of extract_reddit_posts.
+
+    The search listing is read first, then the comment trees of up to
+    max_concurrency submissions are fetched at the same time. PRAW clients
+    aren't thread-safe, so every worker checks its own client out of the
+    reddit_client pool and loads its submission through it. Request starts
+    are paced by the shared rate_limit scheduler, so all workers together
+    stay within each app's Reddit quota. Items are returned in the same
+    order as extract_reddit_posts would return them.
+
+    :param max_concurrency: Maximum number of comment trees fetched at once (default: MAX_CONCURRENCY).
+    :return: A list of posts and comments, grouped per submission in search order.
+    """
+    cache_url, cache_params = _search_cache_entry(
+        query,
+        subreddit,
+        sort,
+        syntax,
+        time_filter,
+        number_of_comments,
+        limit,
+        newer_than,
+        harvest,
+    )
+    cached = _cached_items(cache_url, cache_params)
+    if cached is not None:
+        return cached
+
+    started = time.perf_counter()
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def fetch(submission_id: str) -> list[SocialMediaData]:
+        async with semaphore:
+            with reddit_client.checkout() as reddit:
+                await reddit_client.acquire_async(reddit)
+                items = await asyncio.to_thread(
+                    _submission_items,
+                    reddit,
+                    reddit.submission(id=submission_id),
+                    number_of_comments,
+                    harvest,
                 )
-            )
+                reddit_client.sync_rate_limit(reddit)
+            return items
 
+    # Tags reach the worker threads, to_thread copies the context
+    with metrics.tags(query=query):
+        # PRAW is blocking, so every network call runs in a worker thread
+        with metrics.span("reddit.search"), reddit_client.checkout() as reddit:
+            submission_ids = await asyncio.to_thread(
+                lambda: [
+                    submission.id
+                    for submission in _search(
+                        reddit,
+                        query,
+                        subreddit,
+                        sort,
+                        syntax,
+                        time_filter,
+                        limit,
+                        newer_than,
+                        progress,
+                    )
+                ]
+            )
+        # gather keeps the results in submission order
+        results = await asyncio.gather(*(fetch(s) for s in submission_ids))
+    items = [item for submission_items in results for item in submission_items]
+    _store_items(cache_url, cache_params, items)
+    metrics.record_items(
+        len(items), time.perf_counter() - started, source="reddit", query=query
+    )
     return items
 
 
-reddit_posts = extract_reddit_posts(query="Software Engineers")
-# print(reddit_posts)
+if __name__ == "__main__":
+    reddit_posts = extract_reddit_posts(query="Software Engineers")
+    # print(reddit_posts)
 
-for post in reddit_posts:
-    print(post.content)
-    print(post.title)
-    print(post.type)
-    print(post.url)
-    print(post.author)
-    print(post.parent_id)
+    for post in reddit_posts:
+        print(post.content)
+        print(post.title)
+        print(post.type)
+        print(post.url)
+        print(post.author)
+        print(post.parent_id)
@@ -0,0 +1,233 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Optional
+
+DEFAULT_CACHE_PATH = "response_cache.sqlite3"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024  # compressed bytes kept before LRU eviction
+COMPRESSION_LEVEL = 6
+
+# Seconds an entry stays fresh, per namespace (rate-limit endpoint key or
+# scraper name). None keeps entries until they are evicted.
+DEFAULT_TTLS = {
+    "twitter:search_recent": 15 * 60,
+    "twitter:search_all": 24 * 60 * 60,
+    "twitter:tweets": 24 * 60 * 60,
+    "reddit": 10 * 60,
+    "threads:keyword_search": 60 * 60,
+    "threads_page": 60 * 60,
+}
+DEFAULT_TTL = 10 * 60
+
+# Never part of a cache key, so rotating a token doesn't invalidate the cache
+SECRET_PARAMS = {"access_token", "client_secret", "bearer_token"}
+
+
+class CacheMiss(LookupError):
+    """Raised in offline mode when a response isn't in the cache."""
+
+
+def normalize_params(params) -> str:
+    """Canonical JSON of request params: sorted, stringified, secrets dropped."""
+    if not params:
+        return "{}"
+    items = params.items() if hasattr(params, "items") else params
+    normalized = {}
+    for key, value in items:
+        if key in SECRET_PARAMS or value is None:
+            continue
+        normalized[str(key)] = str(value)
+    return json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+
+
+def cache_key(namespace: str, url: str, params=None) -> str:
+    raw = f"{namespace}\n{url}\n{normalize_params(params)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Compressed on-disk cache of response bodies.
+
+    Entries are keyed on (namespace, url, normalized params) and stored
+    zlib-compressed in one SQLite file. Each namespace has its own TTL; once
+    the file holds more than max_bytes, the least recently read entries are
+    evicted. In offline mode, expired entries are still served and a miss
+    raises CacheMiss instead of going to the network, which replays a
+    previous run exactly.
+
+    Usage:
+        cache = ResponseCache()
+        body = cache.get("reddit", url, params)
+        if body is None:
+            body = fetch(url, params)
+            cache.put("reddit", url, params, body)
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttls: Optional[dict] = None,
+        offline: bool = False,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    namespace TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    body BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed_at"
+                " ON responses (accessed_at)"
+            )
+
+    def ttl(self, namespace: str) -> Optional[float]:
+        return self.ttls.get(namespace, DEFAULT_TTL)
+
+    def get(self, namespace: str, url: str, params=None) -> Optional[bytes]:
+        """
+        Return the cached body, or None on a miss or an expired entry.
+
+        In offline mode, expired entries are returned and a miss raises
+        CacheMiss.
+        """
+        key = cache_key(namespace, url, params)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            ttl = self.ttl(namespace)
+            if row is not None and not self.offline and ttl is not None:
+                if now - row[1] > ttl:
+                    with self._conn:
+                        self._conn.execute(
+                            "DELETE FROM responses WHERE key = ?", (key,)
+                        )
+                    row = None
+            if row is None:
+                self.misses += 1
+                if self.offline:
+                    raise CacheMiss(f"{namespace} {url} {normalize_params(params)}")
+                return None
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+            self.hits += 1
+        return zlib.decompress(row[0])
+
+    def put(self, namespace: str, url: str, params, body: bytes):
+        """Store a response body, evicting old entries if over max_bytes."""
+        compressed = zlib.compress(body, COMPRESSION_LEVEL)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO responses
+                    (key, namespace, url, params, body, size, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    cache_key(namespace, url, params),
+                    namespace,
+                    url,
+                    normalize_params(params),
+                    compressed,
+                    len(compressed),
+                    now,
+                    now,
+                ),
+            )
+            self._evict()
+
+    def _evict(self):
+        """Drop least recently read entries until the cache fits in max_bytes."""
+        (total,) = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at"
+        ).fetchall()
+        doomed = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def clear(self, namespace: Optional[str] = None):
+        with self._lock, self._conn:
+            if namespace is None:
+                self._conn.execute("DELETE FROM responses")
+            else:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE namespace = ?", (namespace,)
+                )
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {
+            "entries": entries,
+            "bytes": size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Process-wide cache used by http_client and the scrapers; off until enabled
+_cache: Optional[ResponseCache] = None
+
+
+def enable(path: str = DEFAULT_CACHE_PATH, **kwargs) -> ResponseCache:
+    """Turn on caching for every fetcher. kwargs go to ResponseCache."""
+    global _cache
+    disable()
+    _cache = ResponseCache(path, **kwargs)
+    return _cache
+
+
+def disable():
+    global _cache
+    if _cache is not None:
+        _cache.close()
+        _cache = None
+
+
+def get_cache() -> Optional[ResponseCache]:
+    return _cache
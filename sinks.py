@@ -0,0 +1,329 @@
+import dataclasses
+import json
+import re
+import sqlite3
+import typing
+from datetime import datetime
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Iterable, Optional
+
+# Parquet needs the optional pyarrow package; it is imported on first use,
+# so JSONL and SQLite output don't pay for loading it
+PARQUET_AVAILABLE = find_spec("pyarrow") is not None
+# Records buffered before a batch is written; one Parquet row group per batch
+BATCH_SIZE = 50_000
+PARQUET_COMPRESSION = "zstd"
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# Column kinds a record field maps to, and how each backend stores them
+STRING, INT, FLOAT, BOOL, TIMESTAMP, STRING_LIST = (
+    "string",
+    "int",
+    "float",
+    "bool",
+    "timestamp",
+    "string_list",
+)
+_KIND_BY_TYPE = {
+    str: STRING,
+    int: INT,
+    float: FLOAT,
+    bool: BOOL,
+    datetime: TIMESTAMP,
+    list: STRING_LIST,
+}
+_SQLITE_TYPES = {
+    STRING: "TEXT",
+    INT: "INTEGER",
+    FLOAT: "REAL",
+    BOOL: "BOOLEAN",
+    TIMESTAMP: "TIMESTAMP",
+    STRING_LIST: "JSON",
+}
+
+
+def _kind(annotation) -> str:
+    """Column kind of a field annotation; Optional[X] is X, unknown types are strings."""
+    args = typing.get_args(annotation)
+    if typing.get_origin(annotation) is typing.Union:
+        annotation = next((a for a in args if a is not type(None)), str)
+    annotation = typing.get_origin(annotation) or annotation
+    return _KIND_BY_TYPE.get(annotation, STRING)
+
+
+def record_schema(record_type) -> list[tuple[str, str]]:
+    """(field name, column kind) pairs of a dataclass record type, in field order."""
+    hints = typing.get_type_hints(record_type)
+    return [(f.name, _kind(hints[f.name])) for f in dataclasses.fields(record_type)]
+
+
+def arrow_type(kind: str):
+    import pyarrow as pa
+
+    return {
+        STRING: pa.string(),
+        INT: pa.int64(),
+        FLOAT: pa.float64(),
+        BOOL: pa.bool_(),
+        TIMESTAMP: pa.timestamp("us"),
+        STRING_LIST: pa.list_(pa.string()),
+    }[kind]
+
+
+def _sqlite_timestamp(value):
+    return value.isoformat(" ") if value is not None else None
+
+
+def _sqlite_json(value):
+    return json.dumps(value) if value is not None else None
+
+
+_SQLITE_CONVERTERS = {TIMESTAMP: _sqlite_timestamp, STRING_LIST: _sqlite_json}
+
+
+def _as_string(value):
+    return value if value is None or isinstance(value, str) else str(value)
+
+
+def json_default(value):
+    """json.dumps default for record values: timestamps as ISO 8601."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def arrow_schema(schema: list[tuple[str, str]]):
+    """pyarrow schema for record_schema() output."""
+    import pyarrow as pa
+
+    return pa.schema([(name, arrow_type(kind)) for name, kind in schema])
+
+
+def arrow_column(values, kind: str, column_type):
+    """pyarrow array of one column's values."""
+    import pyarrow as pa
+
+    try:
+        return pa.array(values, type=column_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        if kind != STRING:
+            raise
+        # IDs sometimes arrive as ints; the column stays a string column
+        return pa.array([_as_string(v) for v in values], type=column_type)
+
+
+def _snake_case(name: str) -> str:
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+
+class Sink:
+    """
+    Base class for record writers.
+
+    Records are SocialMediaData, ThreadsPost or any other dataclass instance;
+    the column schema is taken from the record type's annotations, from
+    record_type or else from the first record written. Rows are buffered
+    and handed to _write_rows batch_size at a time.
+
+    Usage:
+        with open_sink("posts.parquet", ThreadsPost) as sink:
+            sink.write_many(posts)
+    """
+
+    def __init__(self, record_type=None, batch_size: int = BATCH_SIZE):
+        self.batch_size = batch_size
+        self.count = 0
+        self.schema: Optional[list[tuple[str, str]]] = None
+        self._rows: list[tuple] = []
+        if record_type is not None:
+            self._bind(record_type)
+
+    def _bind(self, record_type):
+        self.record_type = record_type
+        self.schema = record_schema(record_type)
+        self.columns = [name for name, _ in self.schema]
+        self._open()
+
+    def write(self, record):
+        if self.schema is None:
+            self._bind(type(record))
+        self._rows.append(tuple(getattr(record, name) for name in self.columns))
+        self.count += 1
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def write_many(self, records: Iterable) -> int:
+        """Write every record; returns how many were written."""
+        before = self.count
+        for record in records:
+            self.write(record)
+        return self.count - before
+
+    def flush(self):
+        if self._rows:
+            self._write_rows(self._rows)
+            self._rows = []
+
+    def close(self):
+        if self.schema is not None:
+            self.flush()
+            self._close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Backend hooks
+    def _open(self):
+        pass
+
+    def _write_rows(self, rows: list[tuple]):
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+
+class ParquetSink(Sink):
+    """
+    Parquet file with typed, compressed columns, one row group per batch.
+
+    Timestamps are stored as timestamps, counts as int64 and URL lists as
+    list<string>, so readers can pull single columns without parsing JSON.
+    Needs the optional pyarrow package.
+    """
+
+    def __init__(
+        self,
+        path,
+        record_type=None,
+        batch_size: int = BATCH_SIZE,
+        compression: str = PARQUET_COMPRESSION,
+    ):
+        if not PARQUET_AVAILABLE:
+            raise ImportError("Parquet output needs pyarrow: pip install pyarrow")
+        self.path = str(path)
+        self.compression = compression
+        self._writer = None
+        super().__init__(record_type, batch_size)
+
+    def _open(self):
+        import pyarrow.parquet as pq
+
+        self.arrow_schema = arrow_schema(self.schema)
+        self._writer = pq.ParquetWriter(
+            self.path, self.arrow_schema, compression=self.compression
+        )
+
+    def _write_rows(self, rows: list[tuple]):
+        import pyarrow as pa
+
+        arrays = [
+            arrow_column(column, kind, field.type)
+            for column, (_, kind), field in zip(
+                zip(*rows), self.schema, self.arrow_schema
+            )
+        ]
+        table = pa.Table.from_arrays(arrays, schema=self.arrow_schema)
+        self._writer.write_table(table, row_group_size=len(rows))
+
+    def _close(self):
+        self._writer.close()
+
+
+class JsonlSink(Sink):
+    """One JSON object per line; timestamps as ISO 8601 strings."""
+
+    def __init__(self, path, record_type=None, batch_size: int = BATCH_SIZE):
+        self.path = str(path)
+        self._file = None
+        super().__init__(record_type, batch_size)
+
+    def _open(self):
+        self._file = open(self.path, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE)
+
+    def _write_rows(self, rows: list[tuple]):
+        self._file.writelines(
+            json.dumps(
+                dict(zip(self.columns, row)),
+                default=json_default,
+                ensure_ascii=False,
+            )
+            + "\n"
+            for row in rows
+        )
+
+    def _close(self):
+        self._file.close()
+
+
+class SQLiteSink(Sink):
+    """
+    SQLite table with one typed column per field, inserted a batch at a time.
+
+    Timestamps are ISO 8601 text in TIMESTAMP columns, lists JSON text. The
+    table is named after the record type unless table is given.
+    """
+
+    def __init__(
+        self,
+        path,
+        record_type=None,
+        batch_size: int = BATCH_SIZE,
+        table: Optional[str] = None,
+    ):
+        self.path = str(path)
+        self.table = table
+        self._conn = None
+        super().__init__(record_type, batch_size)
+
+    def _open(self):
+        self.table = self.table or _snake_case(self.record_type.__name__)
+        self._conn = sqlite3.connect(self.path)
+        columns = ", ".join(
+            f'"{name}" {_SQLITE_TYPES[kind]}' for name, kind in self.schema
+        )
+        with self._conn:
+            self._conn.execute(f'CREATE TABLE IF NOT EXISTS "{self.table}" ({columns})')
+        placeholders = ", ".join("?" for _ in self.schema)
+        self._insert = f'INSERT INTO "{self.table}" VALUES ({placeholders})'
+        self._converters = [_SQLITE_CONVERTERS.get(kind) for _, kind in self.schema]
+
+    def _write_rows(self, rows: list[tuple]):
+        converters = self._converters
+        with self._conn:
+            self._conn.executemany(
+                self._insert,
+                (
+                    tuple(
+                        convert(value) if convert else value
+                        for convert, value in zip(converters, row)
+                    )
+                    for row in rows
+                ),
+            )
+
+    def _close(self):
+        self._conn.close()
+
+
+SINKS_BY_SUFFIX = {
+    ".parquet": ParquetSink,
+    ".jsonl": JsonlSink,
+    ".db": SQLiteSink,
+    ".sqlite": SQLiteSink,
+    ".sqlite3": SQLiteSink,
+}
+
+
+def open_sink(path, record_type=None, **kwargs) -> Sink:
+    """Open the sink matching path's extension (.parquet, .jsonl, .db/.sqlite/.sqlite3)."""
+    suffix = Path(path).suffix.lower()
+    if suffix not in SINKS_BY_SUFFIX:
+        raise ValueError(
+            f"Unsupported output type {suffix!r}; use one of {', '.join(SINKS_BY_SUFFIX)}"
+        )
+    return SINKS_BY_SUFFIX[suffix](path, record_type, **kwargs)
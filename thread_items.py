@@ -0,0 +1,105 @@
+import json
+import re
+from typing import Callable, Dict, Iterator, List, Optional
+
+from nested_lookup import nested_lookup
+
+try:
+    import orjson
+except ImportError:  # optional, only speeds up the full-parse fallback
+    orjson = None
+
+_THREAD_ITEMS_KEY = re.compile(r'"thread_items"\s*:\s*')
+_decoder = json.JSONDecoder()
+
+
+def scan_thread_items(blob: str) -> Iterator[List[Dict]]:
+    """
+    Yield every thread_items value in a JSON document without parsing the rest.
+
+    The key can only appear unescaped as a real object key, so each match is
+    followed by its value, which raw_decode parses in place. Matches are
+    visited in document order, which is the order nested_lookup returns them.
+    """
+    for match in _THREAD_ITEMS_KEY.finditer(blob):
+        value, _ = _decoder.raw_decode(blob, match.end())
+        yield value
+
+
+def thread_items_from_data(data) -> List[List[Dict]]:
+    """
+    Find the thread_items lists in already parsed JSON.
+
+    Tries the path search results use (data.searchResults.edges[].node.thread)
+    and falls back to a full nested_lookup walk for any other shape.
+    """
+    try:
+        edges = data["data"]["searchResults"]["edges"]
+        return [edge["node"]["thread"]["thread_items"] for edge in edges]
+    except (KeyError, TypeError):
+        return nested_lookup("thread_items", data)
+
+
+def loads(blob: str):
+    """json.loads, using orjson when it is installed."""
+    return orjson.loads(blob) if orjson is not None else json.loads(blob)
+
+
+def extract_thread_items(blob: str) -> List[List[Dict]]:
+    """
+    Return the same lists as nested_lookup("thread_items", json.loads(blob)).
+
+    Only the thread_items subtrees are decoded, so the rest of a
+    multi-megabyte data-sjs blob is skipped. If the targeted scan hits
+    something it can't decode, the whole blob is parsed instead.
+    """
+    if "thread_items" not in blob:
+        return []
+    try:
+        return list(scan_thread_items(blob))
+    except json.JSONDecodeError:
+        return thread_items_from_data(loads(blob))
+
+
+def get_path(obj, *keys):
+    """Follow keys through nested dicts; None once a step is missing, like JMESPath."""
+    for key in keys:
+        if not isinstance(obj, dict):
+            return None
+        obj = obj.get(key)
+    return obj
+
+
+def flatten_project(value, project: Callable) -> Optional[list]:
+    """
+    Plain-Python version of a JMESPath flatten projection, value[].expr.
+
+    None if value isn't a list; otherwise nested lists are flattened one
+    level, project is applied to each element and None results are dropped.
+    """
+    if not isinstance(value, list):
+        return None
+    flat = []
+    for element in value:
+        if isinstance(element, list):
+            flat.extend(element)
+        else:
+            flat.append(element)
+    results = []
+    for element in flat:
+        result = project(element)
+        if result is not None:
+            results.append(result)
+    return results
+
+
+def second_candidate_url(media) -> Optional[str]:
+    """image_versions2.candidates[1].url of a media item."""
+    candidates = get_path(media, "image_versions2", "candidates")
+    if isinstance(candidates, list) and len(candidates) > 1:
+        return get_path(candidates[1], "url")
+    return None
+
+
+def media_url(media) -> Optional[str]:
+    return get_path(media, "url")
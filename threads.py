@@ -1,30 +1,61 @@
-import requests
 import os
+import time
 from dotenv import load_dotenv
 
-load_dotenv()
+import http_client
+import metrics
+
+KEYWORD_SEARCH_URL = "https://graph.threads.net/v1.0/keyword_search"
+
+
+def access_token_from_env():
+    """THREADS_APP_SECRET from the environment or .env, read at call time, not import."""
+    load_dotenv()
+    return os.getenv("THREADS_APP_SECRET")
 
 
 def search_threads(
-    keyword, search_type="TOP", access_token=os.getenv("THREADS_APP_SECRET")
+    keyword,
+    search_type="TOP",
+    access_token=None,
+    since=None,
 ):
-    url = "https://graph.threads.net/v1.0/keyword_search"
+    if access_token is None:
+        access_token = access_token_from_env()
     params = {
         "q": keyword,
         "search_type": search_type,
         "fields": "id,text,media_type,permalink,timestamp,username,has_replies,is_quote_post,is_reply",
         "access_token": access_token,
     }
-    response = requests.get(url, params=params)
-    print(response)
-    return response.json()
+    if since is not None:
+        # Only posts published after this Unix timestamp, for incremental runs
+        params["since"] = int(since)
+    started = time.perf_counter()
+    with metrics.tags(query=keyword):
+        response = http_client.get(
+            KEYWORD_SEARCH_URL,
+            params=params,
+            rate_limit_key="threads:keyword_search",
+            credential=access_token,
+        )
+        with metrics.timed("parse_seconds", source="threads"):
+            results = response.json()
+    metrics.record_items(
+        len(results.get("data", [])),
+        time.perf_counter() - started,
+        source="threads",
+        query=keyword,
+    )
+    return results
 
 
 # Example usage
-results = search_threads("dating text")
-for thread in results.get("data", []):
-    print(f"Username: {thread['username']}")
-    print(f"Text: {thread['text']}")
-    print(f"Permalink: {thread['permalink']}")
-    print(f"Timestamp: {thread['timestamp']}")
-    print("-" * 40)
+if __name__ == "__main__":
+    results = search_threads("dating text")
+    for thread in results.get("data", []):
+        print(f"Username: {thread['username']}")
+        print(f"Text: {thread['text']}")
+        print(f"Permalink: {thread['permalink']}")
+        print(f"Timestamp: {thread['timestamp']}")
+        print("-" * 40)
@@ -0,0 +1,154 @@
+from typing import Iterator, Dict
+from urllib.parse import urlsplit
+
+from playwright.async_api import TimeoutError as AsyncTimeoutError
+from playwright.sync_api import TimeoutError as SyncTimeoutError
+
+from thread_items import extract_thread_items
+
+# How long to wait for thread data before parsing whatever the page has
+READY_TIMEOUT_MS = 15000
+READY_POLL_MS = 100
+
+# Infinite-scroll harvesting
+SCROLL_STEP_PX = 4000
+SCROLL_RESPONSE_TIMEOUT_MS = 5000
+# Some endpoints prefix their JSON with this to prevent JSON hijacking
+JSON_GUARD_PREFIX = "for (;;);"
+
+# Only the embedded JSON is needed, so these are safe to drop
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "stylesheet"}
+TRACKER_DOMAINS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "connect.facebook.net",
+    "scorecardresearch.com",
+)
+
+# True once a hidden data-sjs dataset on the page carries thread items
+THREAD_ITEMS_READY_JS = """() => Array.from(
+    document.querySelectorAll('script[type="application/json"][data-sjs]')
+).some((s) => s.textContent.includes('"thread_items"'))"""
+
+
+def wait_for_thread_items(page, timeout: int = READY_TIMEOUT_MS) -> bool:
+    """
+    Wait until the page's hidden JSON datasets contain thread items.
+
+    Returns as soon as the data is present instead of sleeping a fixed time.
+    Returns False if the timeout passes first, e.g. for a query without
+    results; the caller then parses what is there.
+    """
+    try:
+        page.wait_for_function(
+            THREAD_ITEMS_READY_JS, timeout=timeout, polling=READY_POLL_MS
+        )
+        return True
+    except SyncTimeoutError:
+        print(f"No thread items after {timeout} ms")
+        return False
+
+
+async def wait_for_thread_items_async(page, timeout: int = READY_TIMEOUT_MS) -> bool:
+    """Async API version of wait_for_thread_items."""
+    try:
+        await page.wait_for_function(
+            THREAD_ITEMS_READY_JS, timeout=timeout, polling=READY_POLL_MS
+        )
+        return True
+    except AsyncTimeoutError:
+        print(f"No thread items after {timeout} ms")
+        return False
+
+
+def is_pagination_response(response) -> bool:
+    """True for the GraphQL responses the search page loads while scrolling."""
+    return (
+        "/graphql" in response.url and response.request.method == "POST" and response.ok
+    )
+
+
+def thread_items_from_body(body: str) -> Iterator[Dict]:
+    """Yield the raw thread items carried by a pagination response body."""
+    if "thread_items" not in body:
+        return
+    if body.startswith(JSON_GUARD_PREFIX):
+        body = body[len(JSON_GUARD_PREFIX) :]
+    try:
+        threads = extract_thread_items(body)
+    except ValueError:
+        return
+    for thread in threads:
+        yield from thread
+
+
+def should_block(request) -> bool:
+    """True for heavy resources and tracker requests that carry no thread data."""
+    if request.resource_type in BLOCKED_RESOURCE_TYPES:
+        return True
+    host = urlsplit(request.url).hostname or ""
+    return any(host == d or host.endswith("." + d) for d in TRACKER_DOMAINS)
+
+
+def block_heavy_resources(context):
+    """
+    Abort image, media, font and stylesheet requests and known trackers.
+
+    Installed on a sync API browser context, so it covers every page of it.
+    """
+
+    def handle(route):
+        if should_block(route.request):
+            route.abort()
+        else:
+            route.continue_()
+
+    context.route("**/*", handle)
+
+
+async def block_heavy_resources_async(context):
+    """Async API version of block_heavy_resources."""
+
+    async def handle(route):
+        if should_block(route.request):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await context.route("**/*", handle)
+
+
+class TrafficMeter:
+    """
+    Count bytes received by a page, as reported by Chromium's network domain.
+
+    encodedDataLength is the size on the wire (headers plus compressed body),
+    which is what actually costs bandwidth. Chromium only.
+    """
+
+    def __init__(self):
+        self.bytes = 0
+        self.requests = 0
+        self.failed = 0
+
+    def _finished(self, event):
+        self.bytes += event.get("encodedDataLength", 0)
+        self.requests += 1
+
+    def _failed(self, event):
+        self.failed += 1
+
+    def attach(self, page):
+        session = page.context.new_cdp_session(page)
+        session.send("Network.enable")
+        session.on("Network.loadingFinished", self._finished)
+        session.on("Network.loadingFailed", self._failed)
+        return self
+
+    async def attach_async(self, page):
+        session = await page.context.new_cdp_session(page)
+        await session.send("Network.enable")
+        session.on("Network.loadingFinished", self._finished)
+        session.on("Network.loadingFailed", self._failed)
+        return self
@@ -1,79 +1,202 @@
 import json
-from typing import Dict
+from typing import Dict, Iterable
 import jmespath
 from parsel import Selector
-from nested_lookup import nested_lookup
 from playwright.sync_api import sync_playwright
 
-def parse_thread(data: Dict) -> Dict:
-    """Parse Threads post JSON dataset for the most important fields"""
-    result = jmespath.search(
-        """{
+from thread_items import (
+    extract_thread_items,
+    flatten_project,
+    get_path,
+    media_url,
+    second_candidate_url,
+)
+from browser_pool import BrowserPool, POOL_SIZE, MAX_USES_PER_CONTEXT
+from dedupe import DedupeIndex
+import metrics
+from threads_page import wait_for_thread_items, wait_for_thread_items_async
+
+# Compiled once; parse_threads_bulk extracts the same fields without JMESPath
+THREAD_EXPRESSION = jmespath.compile("""{
             text: post.caption.text,
             published_on: post.taken_at,
             id: post.id,
+            pk: post.pk,
             username: post.user.username,
             user_pic: post.user.profile_pic_url,
             user_verified: post.user.is_verified,
             like_count: post.like_count,
             images: post.carousel_media[].image_versions2.candidates[1].url,
             videos: post.video_versions[].url
-        }""",
-        data,
-    )
+        }""")
+
+
+def _finish_thread(result: Dict) -> Dict:
     result["videos"] = list(set(result["videos"] or []))
     result["url"] = f"https://www.threads.net/@{result['username']}/post/{result['id']}"
     return result
 
-def search_threads(keywords: list[str], output_file: str = None) -> dict:
-    """Search Threads posts by keywords"""
+
+def parse_thread(data: Dict) -> Dict:
+    """Parse Threads post JSON dataset for the most important fields"""
+    return _finish_thread(THREAD_EXPRESSION.search(data))
+
+
+def parse_threads_bulk(items: Iterable[Dict]) -> list[Dict]:
+    """Parse a batch of raw thread items; same output as parse_thread per item, without JMESPath"""
+    results = []
+    for data in items:
+        post = get_path(data, "post")
+        user = get_path(post, "user")
+        results.append(
+            _finish_thread(
+                {
+                    "text": get_path(post, "caption", "text"),
+                    "published_on": get_path(post, "taken_at"),
+                    "id": get_path(post, "id"),
+                    "pk": get_path(post, "pk"),
+                    "username": get_path(user, "username"),
+                    "user_pic": get_path(user, "profile_pic_url"),
+                    "user_verified": get_path(user, "is_verified"),
+                    "like_count": get_path(post, "like_count"),
+                    "images": flatten_project(
+                        get_path(post, "carousel_media"), second_candidate_url
+                    ),
+                    "videos": flatten_project(
+                        get_path(post, "video_versions"), media_url
+                    ),
+                }
+            )
+        )
+    return results
+
+
+def extract_threads(html: str) -> list[dict]:
+    """Parse every thread in the hidden JSON datasets of a search page"""
+    all_threads = []
+    seen_pks = set()
+    with metrics.timed("parse_seconds", source="threads_scrape"):
+        selector = Selector(html)
+        hidden_datasets = selector.css(
+            'script[type="application/json"][data-sjs]::text'
+        ).getall()
+
+        # Find and parse the dataset containing thread data
+        for hidden_dataset in hidden_datasets:
+            if '"ScheduledServerJS"' not in hidden_dataset:
+                continue
+            thread_items = extract_thread_items(hidden_dataset)
+
+            if not thread_items:
+                continue
+
+            # Parse thread data
+            threads = parse_threads_bulk(t for thread in thread_items for t in thread)
+            # A post can be listed in more than one dataset
+            for thread in threads:
+                if thread["pk"] in seen_pks:
+                    continue
+                seen_pks.add(thread["pk"])
+                all_threads.append(thread)
+
+    return all_threads
+
+
+def _skip_collected(all_threads: list[dict], dedupe: DedupeIndex = None) -> list[dict]:
+    """Drop threads the dedupe index has seen before, by pk or near-duplicate text"""
+    if dedupe is None:
+        return all_threads
+    return [t for t in all_threads if dedupe.add("threads", t["pk"], t["text"])]
+
+
+def _search_result(
+    search_term: str, all_threads: list[dict], output_file: str = None
+) -> dict:
+    result = {
+        "search_term": search_term,
+        "threads": all_threads,
+        "total_results": len(all_threads),
+    }
+
+    if output_file:
+        with open(output_file, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False)
+
+    return result
+
+
+def search_threads(
+    keywords: list[str], output_file: str = None, dedupe: DedupeIndex = None
+) -> dict:
+    """Search Threads posts by keywords, skipping threads already in the dedupe index if given"""
     search_term = " ".join(keywords)
     search_url = f"https://www.threads.net/search?q={search_term}&serp_type=default"
-    
+
     with sync_playwright() as pw:
         browser = pw.chromium.launch(headless=False)
         context = browser.new_context(viewport={"width": 1920, "height": 1080})
         page = context.new_page()
 
         print(f"Searching for: {search_term}")
-        page.goto(search_url)
-        
-        # Wait for search results to load
-        page.wait_for_selector("[data-pressable-container=true]")
-        page.wait_for_timeout(2000)
+        with metrics.span("threads.page_load", query=search_term):
+            page.goto(search_url, wait_until="domcontentloaded")
+
+            # Wait until the thread data is on the page
+            wait_for_thread_items(page)
 
         # Extract hidden JSON datasets
-        selector = Selector(page.content())
-        hidden_datasets = selector.css('script[type="application/json"][data-sjs]::text').getall()
-        print(f"Found {len(hidden_datasets)} hidden datasets")
+        all_threads = _skip_collected(extract_threads(page.content()), dedupe)
 
-        all_threads = []
-        
-        # Find and parse the dataset containing thread data
-        for hidden_dataset in hidden_datasets:
-            if '"ScheduledServerJS"' not in hidden_dataset:
-                continue
-            data = json.loads(hidden_dataset)
-            thread_items = nested_lookup("thread_items", data)
-            
-            if not thread_items:
-                continue
+        return _search_result(search_term, all_threads, output_file)
 
-            # Parse thread data
-            threads = [parse_thread(t) for thread in thread_items for t in thread]
-            all_threads.extend(threads)
 
-        result = {
-            "search_term": search_term,
-            "threads": all_threads,
-            "total_results": len(all_threads)
-        }
+async def search_threads_async(
+    page, keywords: list[str], output_file: str = None, dedupe: DedupeIndex = None
+) -> dict:
+    """Search Threads posts by keywords on an already open async page"""
+    search_term = " ".join(keywords)
+    search_url = f"https://www.threads.net/search?q={search_term}&serp_type=default"
+
+    print(f"Searching for: {search_term}")
+    with metrics.span("threads.page_load", query=search_term):
+        await page.goto(search_url, wait_until="domcontentloaded")
+
+        # Wait until the thread data is on the page
+        await wait_for_thread_items_async(page)
+
+    all_threads = _skip_collected(extract_threads(await page.content()), dedupe)
+    return _search_result(search_term, all_threads, output_file)
+
+
+async def search_threads_many(
+    keyword_lists: list[list[str]],
+    pool: BrowserPool = None,
+    pool_size: int = POOL_SIZE,
+    max_uses: int = MAX_USES_PER_CONTEXT,
+    headless: bool = False,
+    dedupe: DedupeIndex = None,
+) -> list[dict]:
+    """Run many keyword searches concurrently on a pool of warm browser pages"""
+
+    async def scrape(page, keywords):
+        return await search_threads_async(page, keywords, dedupe=dedupe)
+
+    if pool is None:
+        async with BrowserPool(
+            size=pool_size, max_uses=max_uses, headless=headless
+        ) as own_pool:
+            results = await own_pool.map(scrape, keyword_lists)
+    else:
+        results = await pool.map(scrape, keyword_lists)
 
-        if output_file:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(result, f, ensure_ascii=False, indent=2)
+    output = []
+    for keywords, result in zip(keyword_lists, results):
+        if isinstance(result, Exception):
+            print(f"Error searching for {' '.join(keywords)}: {result}")
+            result = _search_result(" ".join(keywords), [])
+        output.append(result)
+    return output
 
-        return result
 
 # Example usage
 if __name__ == "__main__":
@@ -81,4 +204,4 @@ if __name__ == "__main__":
     output_file = "search_results.json"
     result = search_threads(keywords, output_file)
     print(f"Found {result['total_results']} threads")
-    print(f"Results saved to {output_file}")
\ No newline at end of file
+    print(f"Results saved to {output_file}")
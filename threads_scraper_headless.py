@@ -1,15 +1,52 @@
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Iterator, Dict
+from typing import AsyncIterator, Iterable, Iterator, Dict, Optional
 import json
+import time
 from parsel import Selector
-from nested_lookup import nested_lookup
 import jmespath
 
 from playwright.sync_api import sync_playwright
 
+import metrics
+import response_cache
+from records import intern_fields
+from sinks import PARQUET_AVAILABLE, open_sink
 
-@dataclass
+from thread_items import (
+    extract_thread_items,
+    flatten_project,
+    get_path,
+    media_url,
+    second_candidate_url,
+)
+from browser_pool import BrowserPool, POOL_SIZE, MAX_USES_PER_CONTEXT
+from playwright.async_api import TimeoutError as AsyncTimeoutError
+from playwright.sync_api import TimeoutError as SyncTimeoutError
+
+from threads_page import (
+    SCROLL_RESPONSE_TIMEOUT_MS,
+    SCROLL_STEP_PX,
+    TrafficMeter,
+    block_heavy_resources,
+    is_pagination_response,
+    thread_items_from_body,
+    wait_for_thread_items,
+    wait_for_thread_items_async,
+)
+
+SEARCH_URL = "https://www.threads.net/search?q={query}&serp_type=default"
+# "Recent" tab, newest first, used for incremental runs
+RECENT_SEARCH_URL = SEARCH_URL + "&filter=recent"
+HIDDEN_DATASET_CSS = 'script[type="application/json"][data-sjs]::text'
+# Scroll mode stops after this many seconds or this many scrolls without new posts
+SCROLL_TIME_BUDGET = 300
+MAX_IDLE_SCROLLS = 3
+# response_cache namespace for the raw thread items a search captured
+CACHE_NAMESPACE = "threads_page"
+
+
+@dataclass(frozen=True, slots=True)
 class ThreadsPost:
     post_id: str
     pk: str
@@ -30,11 +67,13 @@ class ThreadsPost:
     user_pk: str
     user_id: str
 
+    def __post_init__(self):
+        # One copy per author, not per post
+        intern_fields(self, ("user_name", "user_pic", "user_pk", "user_id"))
 
-def parse_thread(data: Dict) -> ThreadsPost:
-    """Parse a Threads post JSON dataset into a ThreadsPost dataclass."""
-    result = jmespath.search(
-        """{
+
+# Compiled once; parse_threads_bulk extracts the same fields without JMESPath
+THREAD_EXPRESSION = jmespath.compile("""{
             text: post.caption.text,
             published_on: post.taken_at,
             id: post.id,
@@ -51,9 +90,82 @@ def parse_thread(data: Dict) -> ThreadsPost:
             images: post.carousel_media[].image_versions2.candidates[1].url,
             image_count: post.carousel_media_count,
             videos: post.video_versions[].url
-        }""",
-        data,
-    )
+        }""")
+
+
+@dataclass
+class SearchProgress:
+    """
+    How far an incremental search got.
+
+    reached_mark is set once a post published at or before newer_than was
+    parsed. The "Recent" results are newest first, so everything newer has
+    been seen by then.
+    """
+
+    reached_mark: bool = False
+
+
+def _under_cap(posts_found: int, max_posts_number: Optional[int]) -> bool:
+    """Whether more posts may be collected; a None cap never stops a search."""
+    return max_posts_number is None or posts_found < max_posts_number
+
+
+def _remaining(max_posts_number: Optional[int], posts_found: int) -> Optional[int]:
+    return None if max_posts_number is None else max_posts_number - posts_found
+
+
+def _thread_fields(data: Dict) -> Dict:
+    """Evaluate THREAD_EXPRESSION on one raw item with plain dict access."""
+    if not isinstance(data, dict):
+        return None  # JMESPath gives null here too
+    post = get_path(data, "post")
+    user = get_path(post, "user")
+    return {
+        "text": get_path(post, "caption", "text"),
+        "published_on": get_path(post, "taken_at"),
+        "id": get_path(post, "id"),
+        "pk": get_path(post, "pk"),
+        "code": get_path(post, "code"),
+        "username": get_path(user, "username"),
+        "user_pic": get_path(user, "profile_pic_url"),
+        "user_verified": get_path(user, "is_verified"),
+        "user_pk": get_path(user, "pk"),
+        "user_id": get_path(user, "id"),
+        "has_audio": get_path(post, "has_audio"),
+        "reply_count": get_path(data, "view_replies_cta_string"),
+        "like_count": get_path(post, "like_count"),
+        "images": flatten_project(
+            get_path(post, "carousel_media"), second_candidate_url
+        ),
+        "image_count": get_path(post, "carousel_media_count"),
+        "videos": flatten_project(get_path(post, "video_versions"), media_url),
+    }
+
+
+def parse_thread(data: Dict) -> ThreadsPost:
+    """Parse a Threads post JSON dataset into a ThreadsPost dataclass."""
+    return _build_post(THREAD_EXPRESSION.search(data))
+
+
+def parse_threads_bulk(items: Iterable[Dict]) -> list[ThreadsPost]:
+    """
+    Parse a batch of raw thread items into ThreadsPost objects.
+
+    Gives the same posts as calling parse_thread on each item, but skips the
+    JMESPath interpreter. Items that fail to parse are reported and skipped.
+    """
+    posts = []
+    for data in items:
+        try:
+            posts.append(_build_post(_thread_fields(data)))
+        except Exception as e:
+            print(f"Error processing post: {str(e)}")
+    return posts
+
+
+def _build_post(result: Dict) -> ThreadsPost:
+    """Turn the extracted fields of one post into a ThreadsPost."""
     # Ensure videos are unique
     videos = list(set(result.get("videos") or []))
     # Process reply_count if it's not already an integer
@@ -96,64 +208,509 @@ def parse_thread(data: Dict) -> ThreadsPost:
     )
 
 
+def _page_thread_items(html: str) -> list[Dict]:
+    """The raw thread items from the hidden JSON datasets of a search page."""
+    items = []
+    with metrics.timed("parse_seconds", source="threads_scrape"):
+        selector = Selector(html)
+        hidden_datasets = selector.css(HIDDEN_DATASET_CSS).getall()
+
+        # Iterate over the datasets to locate thread items
+        for hidden_dataset in hidden_datasets:
+            if '"ScheduledServerJS"' not in hidden_dataset:
+                continue
+            if "thread_items" not in hidden_dataset:
+                continue
+            for thread in extract_thread_items(hidden_dataset):
+                items.extend(thread)
+    return items
+
+
+def _search_url(query: str, newer_than: Optional[float] = None) -> str:
+    return (SEARCH_URL if newer_than is None else RECENT_SEARCH_URL).format(query=query)
+
+
+def _parse_new_posts(
+    items: Iterable[Dict],
+    seen_pks: set,
+    newer_than: Optional[float] = None,
+    captured: Optional[list] = None,
+    progress: Optional[SearchProgress] = None,
+) -> Iterator[ThreadsPost]:
+    """
+    Parse raw thread items, skipping posts whose pk was already seen.
+
+    With newer_than, posts published at or before that epoch timestamp are
+    skipped too, and flag progress.reached_mark. Every raw item read is
+    appended to captured, if given.
+    """
+    for t in items:
+        if captured is not None:
+            captured.append(t)
+        try:
+            post = _build_post(_thread_fields(t))
+        except Exception as e:
+            print(f"Error processing post: {str(e)}")
+            continue
+        if post.pk in seen_pks:
+            continue
+        seen_pks.add(post.pk)
+        if newer_than is not None and (post.published_on or 0) <= newer_than:
+            if progress is not None:
+                progress.reached_mark = True
+            continue
+        yield post
+
+
+def parse_search_page(
+    html: str,
+    max_posts_number: Optional[int] = 10,
+    seen_pks: Optional[set] = None,
+    newer_than: Optional[float] = None,
+    captured: Optional[list] = None,
+    progress: Optional[SearchProgress] = None,
+) -> Iterator[ThreadsPost]:
+    """
+    Parse the thread items out of the hidden JSON datasets of a search page.
+
+    max_posts_number=None returns every post on the page.
+    """
+    seen_pks = set() if seen_pks is None else seen_pks
+    if not _under_cap(0, max_posts_number):
+        return
+    posts_found = 0
+    for post in _parse_new_posts(
+        _page_thread_items(html), seen_pks, newer_than, captured, progress
+    ):
+        yield post
+        posts_found += 1
+        if not _under_cap(posts_found, max_posts_number):
+            break
+
+
+def _scroll_harvest(
+    page,
+    pending: list,
+    seen_pks: set,
+    max_posts_number: Optional[int],
+    deadline: float,
+    newer_than: Optional[float] = None,
+    captured: Optional[list] = None,
+    progress: Optional[SearchProgress] = None,
+) -> Iterator[ThreadsPost]:
+    """
+    Scroll the search page and parse the pagination responses it triggers.
+
+    pending is filled by a page "response" listener; every response in it is
+    parsed after each scroll. Stops at max_posts_number new posts (None for
+    no cap), at the deadline, or after MAX_IDLE_SCROLLS scrolls that brought
+    nothing new. On the newest-first results of an incremental run it also
+    stops once a post at or before newer_than is reached (see progress).
+    """
+    progress = SearchProgress() if progress is None else progress
+    posts_found = 0
+    idle_scrolls = 0
+    while (
+        _under_cap(posts_found, max_posts_number)
+        and not progress.reached_mark
+        and idle_scrolls < MAX_IDLE_SCROLLS
+        and time.monotonic() < deadline
+    ):
+        try:
+            with page.expect_response(
+                is_pagination_response, timeout=SCROLL_RESPONSE_TIMEOUT_MS
+            ):
+                page.mouse.wheel(0, SCROLL_STEP_PX)
+        except SyncTimeoutError:
+            pass
+
+        new_posts = 0
+        while pending:
+            body = pending.pop(0).text()
+            with metrics.timed("parse_seconds", source="threads_scrape"):
+                items = thread_items_from_body(body)
+            for post in _parse_new_posts(
+                items, seen_pks, newer_than, captured, progress
+            ):
+                yield post
+                new_posts += 1
+                posts_found += 1
+                if not _under_cap(posts_found, max_posts_number):
+                    return
+        idle_scrolls = 0 if new_posts else idle_scrolls + 1
+
+
+def _cache_params(max_posts_number: Optional[int], scroll: bool, newer_than) -> dict:
+    return {
+        "max_posts_number": max_posts_number,
+        "scroll": scroll,
+        "newer_than": newer_than,
+    }
+
+
+def _cached_posts(
+    search_url: str,
+    params: dict,
+    newer_than: Optional[float],
+    progress: Optional[SearchProgress] = None,
+) -> Optional[list[ThreadsPost]]:
+    """
+    Replay a search from the raw thread items cached by an earlier run.
+
+    None when caching is off or nothing fresh is cached; raises
+    response_cache.CacheMiss in offline mode.
+    """
+    cache = response_cache.get_cache()
+    if cache is None:
+        return None
+    body = cache.get(CACHE_NAMESPACE, search_url, params)
+    if body is None:
+        return None
+    return list(
+        _parse_new_posts(json.loads(body), set(), newer_than, progress=progress)
+    )
+
+
+def _store_items(search_url: str, params: dict, captured: list):
+    cache = response_cache.get_cache()
+    if cache is not None and captured:
+        cache.put(
+            CACHE_NAMESPACE, search_url, params, json.dumps(captured).encode("utf-8")
+        )
+
+
 def threads_posts_get(
-    *, query: str, max_posts_number: int = 10
+    *,
+    query: str,
+    max_posts_number: Optional[int] = 10,
+    scroll: bool = False,
+    time_budget: float = SCROLL_TIME_BUDGET,
+    block_resources: bool = False,
+    newer_than: Optional[float] = None,
+    progress: Optional[SearchProgress] = None,
 ) -> Iterator[ThreadsPost]:
     """
     Fetch posts from Threads based on the given query using a hidden JSON dataset.
+
+    With scroll=True the first page is followed by scrolling the search
+    results and parsing the pagination responses, yielding new posts (unique
+    by pk) as they arrive until max_posts_number (None for no cap),
+    time_budget seconds, or a few scrolls in a row without new posts.
+
+    With block_resources=True, images, media, fonts, stylesheets and tracker
+    requests are aborted; see resource_blocking_report for the savings.
+
+    With newer_than (epoch seconds), the "Recent" results are searched and
+    only posts published after it are returned, for incremental runs.
+    Scrolling then stops at the first older post, and progress (if given)
+    records whether one was reached: if not, the search stopped at a limit
+    and may have missed newer posts.
+
+    While response_cache is enabled, the raw thread items a search read are
+    cached and a repeat of the same search is replayed without a browser.
     """
-    search_url = f"https://www.threads.net/search?q={query}&serp_type=default"
+    search_url = _search_url(query, newer_than)
+    cache_params = _cache_params(max_posts_number, scroll, newer_than)
+    progress = SearchProgress() if progress is None else progress
+    cached = _cached_posts(search_url, cache_params, newer_than, progress)
+    if cached is not None:
+        yield from cached
+        return
+    started = time.perf_counter()
+    deadline = time.monotonic() + time_budget
+    captured = []
+    posts_found = 0
 
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
         context = browser.new_context(viewport={"width": 1920, "height": 1080})
+        if block_resources:
+            block_heavy_resources(context)
         page = context.new_page()
 
+        pending = []
+        if scroll:
+            page.on(
+                "response",
+                lambda r: pending.append(r) if is_pagination_response(r) else None,
+            )
+
         print(f"Searching for: {query}")
-        page.goto(search_url)
-        # Wait for search results to load
-        page.wait_for_selector("[data-pressable-container=true]")
-        page.wait_for_timeout(2000)
+        with metrics.span("threads.page_load", query=query):
+            page.goto(search_url, wait_until="domcontentloaded")
+            # Wait until the thread data is on the page
+            wait_for_thread_items(page)
 
         # Extract hidden JSON datasets from the page
-        selector = Selector(page.content())
-        hidden_datasets = selector.css(
-            'script[type="application/json"][data-sjs]::text'
-        ).getall()
-        print(f"Found {len(hidden_datasets)} hidden datasets")
-
-        posts_found = 0
-        # Iterate over the datasets to locate and parse thread items
-        for hidden_dataset in hidden_datasets:
-            if posts_found >= max_posts_number:
-                break
-            if '"ScheduledServerJS"' not in hidden_dataset:
-                continue
-            if "thread_items" not in hidden_dataset:
-                continue
-            data = json.loads(hidden_dataset)
-            thread_items = nested_lookup("thread_items", data)
-            if not thread_items:
-                continue
-            for thread in thread_items:
-                for t in thread:
-                    if posts_found >= max_posts_number:
-                        break
-                    try:
-                        yield parse_thread(t)
-                        posts_found += 1
-                    except Exception as e:
-                        print(f"Error processing post: {str(e)}")
-                        continue
+        seen_pks = set()
+        for post in parse_search_page(
+            page.content(), max_posts_number, seen_pks, newer_than, captured, progress
+        ):
+            posts_found += 1
+            yield post
+
+        if scroll:
+            for post in _scroll_harvest(
+                page,
+                pending,
+                seen_pks,
+                _remaining(max_posts_number, posts_found),
+                deadline,
+                newer_than,
+                captured,
+                progress,
+            ):
+                posts_found += 1
+                yield post
+
+        browser.close()
+    _store_items(search_url, cache_params, captured)
+    metrics.record_items(
+        posts_found,
+        time.perf_counter() - started,
+        source="threads_scrape",
+        query=query,
+    )
+
+
+async def _scroll_harvest_async(
+    page,
+    pending: list,
+    seen_pks: set,
+    max_posts_number: Optional[int],
+    deadline: float,
+    newer_than: Optional[float] = None,
+    captured: Optional[list] = None,
+    progress: Optional[SearchProgress] = None,
+) -> AsyncIterator[ThreadsPost]:
+    """Async API version of _scroll_harvest."""
+    progress = SearchProgress() if progress is None else progress
+    posts_found = 0
+    idle_scrolls = 0
+    while (
+        _under_cap(posts_found, max_posts_number)
+        and not progress.reached_mark
+        and idle_scrolls < MAX_IDLE_SCROLLS
+        and time.monotonic() < deadline
+    ):
+        try:
+            async with page.expect_response(
+                is_pagination_response, timeout=SCROLL_RESPONSE_TIMEOUT_MS
+            ):
+                await page.mouse.wheel(0, SCROLL_STEP_PX)
+        except AsyncTimeoutError:
+            pass
+
+        new_posts = 0
+        while pending:
+            body = await pending.pop(0).text()
+            with metrics.timed("parse_seconds", source="threads_scrape"):
+                items = thread_items_from_body(body)
+            for post in _parse_new_posts(
+                items, seen_pks, newer_than, captured, progress
+            ):
+                yield post
+                new_posts += 1
+                posts_found += 1
+                if not _under_cap(posts_found, max_posts_number):
+                    return
+        idle_scrolls = 0 if new_posts else idle_scrolls + 1
+
+
+async def threads_posts_get_async(
+    page,
+    *,
+    query: str,
+    max_posts_number: Optional[int] = 10,
+    scroll: bool = False,
+    time_budget: float = SCROLL_TIME_BUDGET,
+    newer_than: Optional[float] = None,
+    progress: Optional[SearchProgress] = None,
+) -> list[ThreadsPost]:
+    """
+    Fetch posts for one query on an already open Playwright async page.
+
+    scroll, time_budget, newer_than, progress and caching work as in
+    threads_posts_get.
+    """
+    search_url = _search_url(query, newer_than)
+    cache_params = _cache_params(max_posts_number, scroll, newer_than)
+    progress = SearchProgress() if progress is None else progress
+    cached = _cached_posts(search_url, cache_params, newer_than, progress)
+    if cached is not None:
+        return cached
+    started = time.perf_counter()
+    deadline = time.monotonic() + time_budget
+    pending = []
+    captured = []
+
+    def collect(response):
+        if is_pagination_response(response):
+            pending.append(response)
+
+    if scroll:
+        page.on("response", collect)
+    try:
+        print(f"Searching for: {query}")
+        with metrics.span("threads.page_load", query=query):
+            await page.goto(search_url, wait_until="domcontentloaded")
+            # Wait until the thread data is on the page
+            await wait_for_thread_items_async(page)
+
+        seen_pks = set()
+        with metrics.tags(query=query):
+            posts = list(
+                parse_search_page(
+                    await page.content(),
+                    max_posts_number,
+                    seen_pks,
+                    newer_than,
+                    captured,
+                    progress,
+                )
+            )
+        if scroll:
+            with metrics.span("threads.scroll", query=query):
+                async for post in _scroll_harvest_async(
+                    page,
+                    pending,
+                    seen_pks,
+                    _remaining(max_posts_number, len(posts)),
+                    deadline,
+                    newer_than,
+                    captured,
+                    progress,
+                ):
+                    posts.append(post)
+        _store_items(search_url, cache_params, captured)
+        metrics.record_items(
+            len(posts),
+            time.perf_counter() - started,
+            source="threads_scrape",
+            query=query,
+        )
+        return posts
+    finally:
+        if scroll:
+            # Pooled pages are reused, so don't leave the listener behind
+            page.remove_listener("response", collect)
+
+
+async def threads_posts_get_many(
+    queries: list[str],
+    *,
+    max_posts_number: int = 10,
+    scroll: bool = False,
+    time_budget: float = SCROLL_TIME_BUDGET,
+    pool: Optional[BrowserPool] = None,
+    pool_size: int = POOL_SIZE,
+    max_uses: int = MAX_USES_PER_CONTEXT,
+    block_resources: bool = False,
+    newer_than: Optional[float] = None,
+) -> dict[str, list[ThreadsPost]]:
+    """
+    Fetch posts for many queries concurrently on a pool of warm browser pages.
+
+    :param queries: Search queries to run.
+    :param max_posts_number: Maximum posts per query.
+    :param scroll: Keep scrolling each search page for more posts.
+    :param time_budget: Seconds of scrolling allowed per query.
+    :param pool: An already started BrowserPool to reuse. If omitted, one is
+        started for this call and closed afterwards.
+    :param pool_size: Number of pages to run in parallel when starting a pool.
+    :param max_uses: Queries per browser context before it is recycled.
+    :param block_resources: Abort heavy resources in a pool started here.
+    :param newer_than: Only return posts published after this epoch timestamp.
+    :return: Posts per query. A query that failed maps to an empty list.
+    """
+
+    async def scrape(page, query):
+        return await threads_posts_get_async(
+            page,
+            query=query,
+            max_posts_number=max_posts_number,
+            scroll=scroll,
+            time_budget=time_budget,
+            newer_than=newer_than,
+        )
+
+    if pool is None:
+        async with BrowserPool(
+            size=pool_size, max_uses=max_uses, block_resources=block_resources
+        ) as own_pool:
+            results = await own_pool.map(scrape, queries)
+    else:
+        results = await pool.map(scrape, queries)
+
+    posts = {}
+    for query, result in zip(queries, results):
+        if isinstance(result, Exception):
+            print(f"Error searching for {query}: {result}")
+            result = []
+        posts[query] = result
+    return posts
+
+
+def measure_page_load(query: str, block_resources: bool = False) -> dict:
+    """
+    Load one search page and measure what it costs.
+
+    :return: Bytes received on the wire, finished and failed (incl. aborted)
+        requests, seconds until the thread data was on the page, and the
+        number of posts parsed.
+    """
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        context = browser.new_context(viewport={"width": 1920, "height": 1080})
+        if block_resources:
+            block_heavy_resources(context)
+        page = context.new_page()
+        meter = TrafficMeter().attach(page)
+
+        start = time.perf_counter()
+        page.goto(SEARCH_URL.format(query=query), wait_until="domcontentloaded")
+        wait_for_thread_items(page)
+        time_to_data = time.perf_counter() - start
+        posts = list(parse_search_page(page.content(), max_posts_number=1000))
 
         browser.close()
 
+    return {
+        "bytes": meter.bytes,
+        "requests": meter.requests,
+        "failed_requests": meter.failed,
+        "time_to_data": time_to_data,
+        "posts": len(posts),
+    }
+
+
+def resource_blocking_report(query: str, runs: int = 3) -> dict:
+    """
+    Compare page loads with and without resource blocking and print the averages.
+    """
+    report = {}
+    for block_resources in (False, True):
+        samples = [measure_page_load(query, block_resources) for _ in range(runs)]
+        report["blocked" if block_resources else "full"] = {
+            key: sum(sample[key] for sample in samples) / runs for key in samples[0]
+        }
+
+    full, blocked = report["full"], report["blocked"]
+    print(f"Resource blocking report for {query!r} ({runs} runs each)")
+    print(f"{'':14}{'full':>14}{'blocked':>14}{'change':>10}")
+    for key in ("bytes", "requests", "time_to_data", "posts"):
+        change = (blocked[key] - full[key]) / full[key] * 100 if full[key] else 0.0
+        print(f"{key:14}{full[key]:>14.2f}{blocked[key]:>14.2f}{change:>9.1f}%")
+    return report
+
 
 if __name__ == "__main__":
     # Example usage: search for posts related to "CBT therapy"
     results = threads_posts_get(query="Smart watches", max_posts_number=10)
-    # Convert posts to a list of dictionaries and save to JSON
-    posts_data = [vars(post) for post in results]
-    with open("threads_posts.json", "w", encoding="utf-8") as f:
-        json.dump(posts_data, f, indent=2, default=str)
-    print("Results saved to threads_posts.json")
+    # Columnar Parquet when pyarrow is installed, JSON Lines otherwise
+    output_file = (
+        "threads_posts.parquet" if PARQUET_AVAILABLE else "threads_posts.jsonl"
+    )
+    with open_sink(output_file, ThreadsPost) as sink:
+        sink.write_many(results)
+    print(f"{sink.count} posts saved to {output_file}")
@@ -0,0 +1,139 @@
+import tweepy
+from datetime import datetime, timedelta
+import time
+
+import metrics
+import rate_limit
+from twitter_auth import bearer_token
+
+MAX_RATE_LIMIT_RETRIES = 3
+
+
+def _endpoint_key(route):
+    """Scheduler key for a v2 route, e.g. /2/tweets/search/recent -> twitter:search_recent."""
+    name = route.strip("/").removeprefix("2/").removeprefix("tweets/")
+    return "twitter:" + name.replace("/", "_")
+
+
+class ScheduledClient(tweepy.Client):
+    """
+    tweepy.Client that routes every call through the shared rate-limit scheduler.
+
+    Requests wait for a token from the bucket of their endpoint, and the
+    x-rate-limit-* headers of each response keep that bucket in sync. On a 429
+    the bucket pauses until the window resets and the request is retried,
+    instead of the keyword's data being dropped. Every attempt is recorded
+    in metrics.
+    """
+
+    def request(self, method, route, params=None, json=None, user_auth=False):
+        endpoint = _endpoint_key(route)
+        metric_endpoint = endpoint.partition(":")[2]
+        credential = self.access_token if user_auth else self.bearer_token
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            rate_limit.scheduler.acquire(endpoint, credential)
+            start = time.perf_counter()
+            try:
+                response = super().request(method, route, params, json, user_auth)
+            except tweepy.HTTPException as e:
+                metrics.record_request(
+                    "twitter",
+                    metric_endpoint,
+                    e.response.status_code,
+                    time.perf_counter() - start,
+                )
+                if not isinstance(e, tweepy.TooManyRequests):
+                    raise
+                rate_limit.scheduler.update_from_headers(
+                    endpoint, e.response.headers, credential
+                )
+                if attempt == MAX_RATE_LIMIT_RETRIES:
+                    raise
+                metrics.record_retry("twitter", metric_endpoint, 429)
+                continue
+            metrics.record_request(
+                "twitter",
+                metric_endpoint,
+                response.status_code,
+                time.perf_counter() - start,
+                len(response.content),
+            )
+            rate_limit.scheduler.update_from_headers(
+                endpoint, response.headers, credential
+            )
+            return response
+
+
+_client = None
+
+
+def get_client() -> ScheduledClient:
+    """The shared Tweepy client, built on first use rather than at import."""
+    global _client
+    if _client is None:
+        _client = ScheduledClient(bearer_token=bearer_token())
+    return _client
+
+
+def fetch_tweets(keyword, max_results=10, start_days_ago=7):
+    """
+    Fetch tweets based on a keyword from the last 7 days (recent search).
+
+    For older tweets, use raw_api.backfill, which pages the full archive.
+
+    Parameters:
+        keyword (str): The keyword to search for.
+        max_results (int): Number of tweets to fetch per request (10-100).
+        start_days_ago (int): How many days ago to start the search.
+
+    Returns:
+        list: A list of tweets matching the query.
+    """
+    try:
+        # Define the search parameters
+        start_time = (datetime.utcnow() - timedelta(days=start_days_ago)).isoformat(
+            "T"
+        ) + "Z"
+        query = f"{keyword} lang:en"  # Add filters, e.g., language
+
+        # Fetch tweets
+        response = get_client().search_recent_tweets(
+            query=query,
+            start_time=start_time,
+            max_results=max_results,
+            tweet_fields=["id", "text", "author_id", "created_at"],
+        )
+
+        # Parse response
+        tweets = []
+        if response.data:
+            for tweet in response.data:
+                tweets.append(
+                    {
+                        "id": tweet.id,
+                        "text": tweet.text,
+                        "author_id": tweet.author_id,
+                        "created_at": tweet.created_at,
+                    }
+                )
+        return tweets
+
+    except tweepy.TooManyRequests:
+        print("Rate limit exceeded. Please wait and try again.")
+        return []
+    except tweepy.TweepyException as e:
+        print(f"Error: {e}")
+        return []
+
+
+# Example usage
+if __name__ == "__main__":
+    keyword = "dating text"
+    tweets = fetch_tweets(keyword, max_results=10, start_days_ago=1)
+
+    if tweets:
+        print(f"Found {len(tweets)} tweets:")
+        for tweet in tweets:
+            print(f"{tweet['created_at']} - {tweet['text']}")
+    else:
+        print("No tweets found.")
@@ -0,0 +1,24 @@
+import os
+
+from dotenv import load_dotenv
+
+_bearer_token = None
+
+
+def bearer_token() -> str:
+    """
+    The Twitter API bearer token, read from the environment (or .env) on first use.
+
+    Kept apart from raw_api so the tweepy path doesn't load the httpx stack
+    just to read its credential. Importing this module needs no
+    credentials; a missing token only raises once a request is about to be
+    made.
+    """
+    global _bearer_token
+    if _bearer_token is None:
+        load_dotenv()
+        token = os.getenv("TWITTER_BEARER_TOKEN")
+        if not token or token == "None":
+            raise ValueError("BEARER_TOKEN not found in environment variables")
+        _bearer_token = token
+    return _bearer_token